@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import asyncio
 import bcrypt
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update
 from app.core.config import async_session_factory, init_db
 from app.models.models import User, Shop, users_shops
 import sys
@@ -260,6 +260,11 @@ class MainApplication:
 
     async def _delete_shop(self, shop_id: int):
         async with async_session_factory() as session:
+            # API workers cache memberships; bumping auth_version makes them reload
+            members = select(users_shops.c.user_id).where(users_shops.c.shop_id == shop_id)
+            await session.execute(
+                update(User).where(User.id.in_(members)).values(auth_version=User.auth_version + 1)
+            )
             await session.execute(delete(Shop).where(Shop.id == shop_id))
             await session.commit()
 
@@ -294,7 +299,9 @@ class MainApplication:
                 shop_id=shop_id
             )
             await session.execute(stmt)
+            await self._bump_auth_version(session, user_id)
             await session.commit()
+
     def assign_user_to_shop(self):
         selected_user = self.assign_users_tree.selection()
         selected_shop = self.assign_shops_tree.selection()
@@ -320,8 +327,16 @@ class MainApplication:
                     users_shops.c.shop_id == shop_id
                 )
             )
+            await self._bump_auth_version(session, user_id)
             await session.commit()
 
+    @staticmethod
+    async def _bump_auth_version(session, user_id: int):
+        # API workers cache memberships; bumping auth_version makes them reload
+        await session.execute(
+            update(User).where(User.id == user_id).values(auth_version=User.auth_version + 1)
+        )
+
     def remove_assignment(self):
         selected_user = self.assign_users_tree.selection()
         selected_shop = self.assign_shops_tree.selection()
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.api.user_routers import get_current_active_admin
+from app.core.cache import user_cache, shop_membership_cache, top_items_cache
+from app.core.query_stats import query_stats
+from app.core.response_cache import response_cache
+from app.models.models import User
+
+admin_router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
+
+
+@admin_router.get("/cache/stats")
+async def get_cache_stats(current_user: User = Depends(get_current_active_admin)):
+    """Hit ratios and sizes of the server's caches"""
+    return {
+        "response_cache": await response_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "shop_membership_cache": shop_membership_cache.stats(),
+        "top_items_cache": top_items_cache.stats()
+    }
+
+
+@admin_router.get("/queries")
+async def get_query_stats(
+        limit: int = Query(default=50, ge=1, le=1000),
+        order_by: str = Query(default="total_ms", pattern="^(total_ms|count|mean_ms|max_ms|p95_ms)$"),
+        current_user: User = Depends(get_current_active_admin)
+):
+    """Latency histograms per statement shape and the most recent slow queries"""
+    return query_stats.snapshot(limit, order_by)
+
+
+@admin_router.delete("/queries", status_code=204)
+async def reset_query_stats(current_user: User = Depends(get_current_active_admin)):
+    query_stats.reset()
@@ -1,14 +1,28 @@
+import os
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func, case
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 from datetime import datetime
-from app.core.config import get_db
+from app.core.config import get_db, settings
+from app.core.etag import etag_matches, not_modified
+from app.core.response_cache import cached_json_response
+from app.core.serialization import json_response
+from app.core.pdf_renderer import pdf_renderer, invoice_pdf_data
 from app.api.user_routers import get_current_user, create_access_token
 from app.crud.invoice_crud import fetch_invoice, fetch_invoices_with_filters, insert_invoice, check_user_shop_access, \
-    update_invoice_db, delete_invoice_db
-from app.models.models import User, Invoice
-from app.schemas.schemas import InvoiceCreate, InvoiceResponse, InvoiceFilter, InvoiceUpdate
+    update_invoice_db, delete_invoice_db, encode_invoice_cursor, fetch_invoice_summaries, invoice_summary_to_dict, \
+    insert_invoices_bulk, update_invoices_status_bulk, get_user_shop_ids, fetch_invoice_etag, fetch_invoice_list_etag, \
+    invoice_to_dict, fetch_shop_list_versions
+from app.crud.export_crud import build_invoice_export_query, stream_invoice_export
+from app.crud.item_crud import fetch_top_items
+from app.crud.pdf_crud import fetch_batch_invoice_ids, render_batch_pdf, stream_invoice_zip
+from app.crud.search_crud import search_invoices
+from app.crud.stats_crud import fetch_invoice_stats, fetch_invoice_series
+from app.models.models import User
+from app.schemas.schemas import InvoiceCreate, InvoiceResponse, InvoiceFilter, InvoiceUpdate, InvoiceBulkCreate, \
+    InvoiceBulkResponse, InvoiceBulkStatusUpdate, InvoiceBulkStatusResponse, InvoicePdfBatch
 
 router = APIRouter(prefix="/api/v1")
 
@@ -21,6 +35,8 @@ async def get_last_invoice(
     try:
         if current_user.last_invoice_id:
             invoice = await fetch_invoice(session, current_user.last_invoice_id, current_user)
+            if settings.FAST_JSON_RESPONSES:
+                return json_response(invoice_to_dict(invoice))
             return invoice
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -44,39 +60,108 @@ async def get_invoice_stats(
         if not shop_id and current_user.current_shop_id:
             shop_id = current_user.current_shop_id
 
-        query = select(
-            func.count(Invoice.id).label('total_invoices'),
-            func.sum(Invoice.total_amount).label('total_amount'),
-            func.avg(Invoice.total_amount).label('average_amount'),
-            func.sum(case((Invoice.is_paid, 1), else_=0)).label('paid_invoices'),
-        )
-
         if shop_id:
-            has_access = await check_user_shop_access(session, current_user.id, shop_id)
+            has_access = await check_user_shop_access(session, current_user, shop_id)
             if not has_access:
                 raise HTTPException(status_code=403, detail="No access to this shop")
-            query = query.where(Invoice.shop_id == shop_id)
 
-        if start_date:
-            query = query.where(Invoice.created_at >= start_date)
-        if end_date:
-            query = query.where(Invoice.created_at <= end_date)
+        async def build_stats():
+            stats = await fetch_invoice_stats(session, shop_id, start_date, end_date)
+
+            total_invoices = stats["total_invoices"]
+            total_amount = stats["total_amount"]
+            average_amount = total_amount / total_invoices if total_invoices else 0.0
+            paid_invoices = stats["paid_invoices"]
+
+            return {
+                "total_invoices": total_invoices,
+                "total_amount": total_amount,
+                "average_amount": average_amount,
+                "paid_invoices": paid_invoices,
+                "unpaid_invoices": total_invoices - paid_invoices,
+                "shop_id": shop_id
+            }, {}
+
+        if not shop_id:
+            # Stats over all shops are not tied to a shop version, so they are not cached
+            content, _ = await build_stats()
+            return content
+
+        params = {"shop_id": shop_id, "start_date": start_date, "end_date": end_date}
+        versions = await fetch_shop_list_versions(session, [shop_id])
+        return await cached_json_response("stats", versions, params, build_stats)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-        result = await session.execute(query)
-        stats = result.first()
+@router.get("/invoices/stats/series")
+async def get_invoice_series(
+        bucket: str = Query(default="day", pattern="^(day|week|month)$"),
+        shop_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    try:
+        if not shop_id and current_user.current_shop_id:
+            shop_id = current_user.current_shop_id
+
+        # Without a shop, the series covers the shops the user is assigned to
+        accessible_shops = await get_user_shop_ids(session, current_user)
+        if shop_id:
+            if shop_id not in accessible_shops:
+                raise HTTPException(status_code=403, detail="No access to this shop")
+            shop_ids = frozenset([shop_id])
+        else:
+            shop_ids = accessible_shops
+
+        async def build_series():
+            series = await fetch_invoice_series(session, shop_ids, start_date, end_date, bucket)
+            return {
+                "bucket": bucket,
+                "shop_id": shop_id,
+                "series": series
+            }, {}
+
+        params = {"shop_ids": sorted(shop_ids), "bucket": bucket, "start_date": start_date, "end_date": end_date}
+        versions = await fetch_shop_list_versions(session, sorted(shop_ids))
+        return await cached_json_response("series", versions, params, build_series)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/items/top")
+async def get_top_items(
+        shop_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        sort: str = Query(default="quantity", pattern="^(quantity|revenue)$"),
+        limit: int = Query(default=20, ge=1, le=100),
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    try:
+        if not shop_id and current_user.current_shop_id:
+            shop_id = current_user.current_shop_id
 
-        total_invoices = stats.total_invoices or 0
-        total_amount = float(stats.total_amount or 0)
-        average_amount = float(stats.average_amount or 0)
-        paid_invoices = stats.paid_invoices or 0
+        accessible_shops = await get_user_shop_ids(session, current_user)
+        if shop_id:
+            if shop_id not in accessible_shops:
+                raise HTTPException(status_code=403, detail="No access to this shop")
+            shop_ids = frozenset([shop_id])
+        else:
+            shop_ids = accessible_shops
 
+        items = await fetch_top_items(session, shop_ids, start_date, end_date, sort, limit)
         return {
-            "total_invoices": total_invoices,
-            "total_amount": total_amount,
-            "average_amount": average_amount,
-            "paid_invoices": paid_invoices,
-            "unpaid_invoices": total_invoices - paid_invoices,
-            "shop_id": shop_id
+            "shop_id": shop_id,
+            "sort": sort,
+            "items": items
         }
     except HTTPException as e:
         raise e
@@ -122,6 +207,49 @@ async def create_invoice(
         )
 
 
+@router.post('/invoices/bulk', response_model=InvoiceBulkResponse, status_code=201)
+async def create_invoices_bulk(
+        bulk_data: InvoiceBulkCreate,
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    if not bulk_data.invoices:
+        raise HTTPException(status_code=400, detail="No invoices to create")
+    if len(bulk_data.invoices) > settings.BULK_INVOICE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BULK_INVOICE_MAX_ITEMS} invoices per request"
+        )
+
+    try:
+        for invoice_data in bulk_data.invoices:
+            if not invoice_data.shop_id and current_user.current_shop_id:
+                invoice_data.shop_id = current_user.current_shop_id
+
+        results = await insert_invoices_bulk(
+            session=session,
+            invoices_data=bulk_data.invoices,
+            current_user=current_user,
+            atomic=bulk_data.mode == "atomic"
+        )
+        created = sum(1 for result in results if result.status == "created")
+        return InvoiceBulkResponse(
+            created=created,
+            rejected=len(results) - created,
+            results=results
+        )
+
+    except HTTPException as e:
+        await session.rollback()
+        raise e
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 @router.get("/invoices/", response_model=List[InvoiceResponse])
 async def list_invoices(
         shop_id: Optional[int] = None,
@@ -132,6 +260,88 @@ async def list_invoices(
         max_amount: Optional[float] = None,
         skip: int = Query(default=0, ge=0),
         limit: int = Query(default=100, le=100),
+        after: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header"),
+        view: str = Query(default="full", pattern="^(full|summary)$"),
+        if_none_match: Optional[str] = Header(default=None),
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    if not shop_id and current_user.current_shop_id:
+        shop_id = current_user.current_shop_id
+
+    filters = InvoiceFilter(
+        shop_id=shop_id,
+        is_paid=is_paid,
+        created_after=created_after,
+        created_before=created_before,
+        min_amount=min_amount,
+        max_amount=max_amount
+    )
+    try:
+        etag = await fetch_invoice_list_etag(session, current_user, filters, (skip, limit, after, view))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        async def build_page():
+            headers = {}
+            if view == "summary":
+                # Lean projection: plain rows serialized directly, bypassing InvoiceResponse
+                rows = await fetch_invoice_summaries(
+                    session,
+                    current_user,
+                    filters,
+                    skip,
+                    limit,
+                    after
+                )
+                if rows and len(rows) == limit:
+                    headers["X-Next-Cursor"] = encode_invoice_cursor(rows[-1])
+                return [invoice_summary_to_dict(row) for row in rows], headers
+
+            invoices = await fetch_invoices_with_filters(
+                session,
+                current_user,
+                filters,
+                skip,
+                limit,
+                after
+            )
+            # A full page means there may be more rows; hand out a cursor for the next one
+            if invoices and len(invoices) == limit:
+                headers["X-Next-Cursor"] = encode_invoice_cursor(invoices[-1])
+            if settings.FAST_JSON_RESPONSES:
+                content = [invoice_to_dict(invoice) for invoice in invoices]
+            else:
+                content = [InvoiceResponse.model_validate(invoice).model_dump(mode="json") for invoice in invoices]
+            return content, headers
+
+        if skip == 0 and after is None:
+            # First pages are what screens request over and over; deeper pages go to the database.
+            # The ETag already covers the shops' list versions, the filters and the page
+            page_response = await cached_json_response("invoices", etag, {}, build_page)
+        else:
+            content, headers = await build_page()
+            page_response = json_response(content, headers=headers)
+
+        page_response.headers["ETag"] = etag
+        return page_response
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/invoices/export")
+async def export_invoices(
+        export_format: str = Query(default="csv", alias="format", pattern="^(csv|ndjson)$"),
+        shop_id: Optional[int] = None,
+        is_paid: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        flatten_items: bool = False,
+        chunk_size: Optional[int] = Query(default=None, ge=1, le=50000),
         current_user: User = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
 ):
@@ -147,28 +357,125 @@ async def list_invoices(
         max_amount=max_amount
     )
     try:
-        invoices = await fetch_invoices_with_filters(
+        # Access is checked here, while errors can still become a proper status code
+        accessible_shops = await get_user_shop_ids(session, current_user)
+        query = build_invoice_export_query(
+            filters,
+            accessible_shops,
+            include_items=flatten_items or export_format == "ndjson"
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_invoice_export(query, export_format, flatten_items, chunk_size or settings.EXPORT_CHUNK_SIZE),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="invoices.{export_format}"'}
+    )
+
+
+@router.post("/invoices/pdf/batch")
+async def export_invoice_pdfs(
+        batch: InvoicePdfBatch,
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    try:
+        invoice_ids = await fetch_batch_invoice_ids(
             session,
             current_user,
-            filters,
-            skip,
-            limit
+            batch.ids,
+            batch.filter,
+            settings.PDF_BATCH_MAX_INVOICES
+        )
+        if batch.format == "pdf":
+            pdf_path = await render_batch_pdf(session, invoice_ids, window=settings.PDF_RENDER_WORKERS * 4)
+            return FileResponse(
+                pdf_path,
+                media_type="application/pdf",
+                filename="invoices.pdf",
+                background=BackgroundTask(os.remove, pdf_path)
+            )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        stream_invoice_zip(invoice_ids, window=settings.PDF_RENDER_WORKERS * 4),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="invoices.zip"'}
+    )
+
+
+@router.get("/invoices/search")
+async def search_invoice_list(
+        q: str = Query(min_length=1, max_length=200),
+        shop_id: Optional[int] = None,
+        skip: int = Query(default=0, ge=0),
+        limit: int = Query(default=20, ge=1, le=100),
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    try:
+        accessible_shops = await get_user_shop_ids(session, current_user)
+        if shop_id:
+            if shop_id not in accessible_shops:
+                raise HTTPException(status_code=403, detail="No access to this shop")
+            accessible_shops = frozenset([shop_id])
+
+        results = await search_invoices(session, q, accessible_shops, skip, limit)
+        return JSONResponse(content=results)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.patch("/invoices/status", response_model=InvoiceBulkStatusResponse)
+async def update_invoices_status(
+        status_data: InvoiceBulkStatusUpdate,
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    try:
+        updated_ids = await update_invoices_status_bulk(
+            session,
+            current_user,
+            status_data.is_paid,
+            status_data.ids,
+            status_data.filter
         )
-        return invoices
+        return InvoiceBulkStatusResponse(is_paid=status_data.is_paid, updated_ids=updated_ids)
     except HTTPException as e:
+        await session.rollback()
         raise e
     except Exception as e:
+        await session.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/invoices/{invoice_id}", response_model=InvoiceResponse)
 async def get_invoice(
+        response: Response,
         invoice_id: int,
+        if_none_match: Optional[str] = Header(default=None),
         current_user: User = Depends(get_current_user),
         session: AsyncSession = Depends(get_db)
 ):
     try:
+        # Version lookup only; the invoice is loaded just when the client's copy is stale
+        etag = await fetch_invoice_etag(session, invoice_id, current_user)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
         invoice = await fetch_invoice(session, invoice_id, current_user)
+        if settings.FAST_JSON_RESPONSES:
+            return json_response(invoice_to_dict(invoice), headers={"ETag": etag})
+        response.headers["ETag"] = etag
         return invoice
     except HTTPException as e:
         raise e
@@ -176,6 +483,22 @@ async def get_invoice(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/invoices/{invoice_id}/pdf")
+async def get_invoice_pdf(
+        invoice_id: int,
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_db)
+):
+    try:
+        invoice = await fetch_invoice(session, invoice_id, current_user)
+        pdf_path = await pdf_renderer.render_invoice(invoice_pdf_data(invoice))
+        return FileResponse(pdf_path, media_type="application/pdf", filename=f"invoice_{invoice_id}.pdf")
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.patch("/invoices/{invoice_id}", response_model=InvoiceResponse)
 async def update_invoice(
         invoice_id: int,
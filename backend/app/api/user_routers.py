@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import get_db
 from app.models.models import User
 from app.crud.user_crud import get_user_shop_data, ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, verify_password, \
-    get_current_user, get_password_hash
+    get_current_user, get_password_hash, invalidate_cached_user
 from app.schemas.schemas import UserResponse, UserCreate, Token
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
@@ -46,7 +46,7 @@ async def authenticate_user(session: AsyncSession, login: str, password: str) ->
 
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await verify_password(password, user.password):
         return None
     return user
 
@@ -89,7 +89,7 @@ async def register_user(
         user_data: UserCreate,
         session: AsyncSession = Depends(get_db)
 ):
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     new_user = User(
         login=user_data.login,
         email=user_data.email,
@@ -118,14 +118,17 @@ async def change_password(
         session: AsyncSession = Depends(get_db)
 ):
     """Change user password"""
-    if not verify_password(old_password, current_user.password):
+    if not await verify_password(old_password, current_user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password"
         )
 
-    current_user.password = get_password_hash(new_password)
+    current_user.password = await get_password_hash(new_password)
+    # Other workers drop their cached copy of the user when they see the new version
+    current_user.auth_version += 1
     await session.commit()
+    invalidate_cached_user(current_user.id)
 
     return {"message": "Password updated successfully"}
 
@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None when missing or expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+class ShopMembershipCache:
+    """
+    Maps user_id to the frozenset of shop_ids the user is assigned to.
+
+    Entries are stored with the user's ``auth_version`` and only served to a
+    caller presenting the same one. Membership changes made by another process
+    (e.g. the admin panel) bump that column, so they take effect as soon as the
+    user is reloaded, at the latest after the user cache TTL.
+
+    Every local invalidation bumps ``version``. A loader reads the version before
+    querying and its result is only stored if no invalidation happened in the
+    meantime, so a slow load cannot resurrect a membership that was just revoked.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._cache = TTLCache(max_size, ttl_seconds)
+        self.version = 0
+
+    def get(self, user_id: int, auth_version: int) -> Optional[FrozenSet[int]]:
+        entry = self._cache.get(user_id)
+        if entry is None or entry[0] != auth_version:
+            return None
+        return entry[1]
+
+    def set(self, user_id: int, shop_ids: FrozenSet[int], version: int, auth_version: int) -> None:
+        if version == self.version:
+            self._cache.set(user_id, (auth_version, shop_ids))
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Forget one user's memberships, or everyone's when user_id is None"""
+        self.version += 1
+        if user_id is None:
+            self._cache.clear()
+        else:
+            self._cache.invalidate(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "version": self.version}
+
+
+# Column values of authenticated users keyed by user_id
+user_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+# Shop IDs each user may access, keyed by user_id
+shop_membership_cache = ShopMembershipCache(
+    settings.SHOP_ACCESS_CACHE_MAX_SIZE,
+    settings.SHOP_ACCESS_CACHE_TTL_SECONDS
+)
+
+# Top-selling item reports keyed by (shop_ids, start, end, sort, limit).
+# Not invalidated on writes: reports may lag new invoices by up to the TTL.
+top_items_cache = TTLCache(settings.TOP_ITEMS_CACHE_MAX_SIZE, settings.TOP_ITEMS_CACHE_TTL_SECONDS)
@@ -1,11 +1,15 @@
 # config.py
 import os
 from typing import AsyncGenerator
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from pydantic_settings import BaseSettings
 from sqlalchemy import text
 import asyncio
+from app.db.migrations import run_migrations
+from app.core.query_stats import query_stats, query_route
+from app.core.metrics import InstrumentedPool
 
 
 class Settings(BaseSettings):
@@ -14,6 +18,68 @@ class Settings(BaseSettings):
     DB_HOST: str
     DB_NAME: str
     DB_PORT: int
+    # Connections kept open and opened on demand by each process; app.serve derives them from the budget below
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Production launcher (app.serve): workers (0 = one per core) and the MySQL max_connections budget
+    WEB_WORKERS: int = 0
+    DB_MAX_CONNECTIONS: int = 151
+    DB_RESERVED_CONNECTIONS: int = 10
+    # Print every statement; statement timing is always collected by app.core.query_stats
+    DB_ECHO: bool = False
+    # Statements slower than this go to the slow-query log, with parameters for a sample of them
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_PARAMS_SAMPLE_RATE: float = 0.1
+    # Capture the EXPLAIN plan of each slow SELECT shape once (MySQL only)
+    SLOW_QUERY_EXPLAIN: bool = False
+
+    # In-process cache of authenticated users; TTL of 0 disables it. Also bounds how long
+    # edits made by other processes (admin panel, other workers) take to be seen
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    # In-process cache of user -> shop memberships; TTL of 0 disables it
+    SHOP_ACCESS_CACHE_TTL_SECONDS: int = 60
+    SHOP_ACCESS_CACHE_MAX_SIZE: int = 10000
+    # Cache of top-selling item reports keyed by their parameters; TTL of 0 disables it
+    TOP_ITEMS_CACHE_TTL_SECONDS: int = 30
+    TOP_ITEMS_CACHE_MAX_SIZE: int = 1000
+    # Cache of stats and invoice list responses: "memory" (one copy per worker), "redis" or "none"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Serialize hot read endpoints from ORM objects without response model validation
+    FAST_JSON_RESPONSES: bool = False
+
+    # Readiness probe: deadline of its SELECT 1 and the limits past which the worker reports not ready
+    HEALTH_DB_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_MAX_DB_LATENCY_MS: float = 250
+    HEALTH_MAX_POOL_WAIT_MS: float = 500
+    HEALTH_MAX_POOL_SATURATION: float = 0.9
+
+    # bcrypt threads per process and the number of callers allowed to wait for one before 503s
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 256
+
+    # Maximum number of invoices accepted by one bulk create request
+    BULK_INVOICE_MAX_ITEMS: int = 10000
+    # Rows fetched from the server-side cursor per chunk of an invoice export
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    # Server-side PDF rendering: font shared with the client, disk cache and worker processes
+    PDF_FONT_PATH: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+        "front", "fonts", "DejaVuSans.ttf"
+    )
+    PDF_CACHE_DIR: str = "pdf_cache"
+    PDF_RENDER_WORKERS: int = 2
+    # Disk cache bounds, enforced by a sweep run at most once per interval
+    PDF_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    PDF_CACHE_MAX_AGE_SECONDS: int = 7 * 24 * 3600
+    PDF_CACHE_PRUNE_INTERVAL_SECONDS: int = 60
+    # Maximum number of invoices in one batch PDF/ZIP request
+    PDF_BATCH_MAX_INVOICES: int = 500
 
     @property
     def DATABASE_URL(self) -> str:
@@ -28,10 +94,20 @@ settings = Settings()
 # Create engine instance
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     pool_pre_ping=True,
     pool_recycle=3600
 )
+query_stats.install(
+    engine,
+    slow_threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    slow_log_size=settings.SLOW_QUERY_LOG_SIZE,
+    params_sample_rate=settings.SLOW_QUERY_PARAMS_SAMPLE_RATE,
+    explain=settings.SLOW_QUERY_EXPLAIN
+)
 
 # Create session factory bound to the engine
 async_session_factory = async_sessionmaker(
@@ -49,7 +125,10 @@ class Base(DeclarativeBase):
 
 
 # Database dependency
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # Statements of this request are attributed to its route template
+    route = request.scope.get("route")
+    query_route.set(f"{request.method} {route.path}" if route else request.url.path)
     async with async_session_factory() as session:
         try:
             yield session
@@ -57,15 +136,15 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-# Initialize database connection and create tables if they don't exist
+# Initialize database connection and apply pending schema migrations
 async def init_db() -> None:
-    """Initialize database connection and create tables if they don't exist"""
+    """Initialize database connection and apply pending schema migrations"""
     try:
         async with engine.begin() as conn:
             await conn.execute(text("SELECT 1"))
             print("Database connection successful")
-            await conn.run_sync(Base.metadata.create_all)
-            print("Database tables initialized")
+        applied = await run_migrations(engine)
+        print(f"Database schema migrated: {applied}" if applied else "Database schema is up to date")
     except Exception as e:
         print(f"Error initializing database: {str(e)}")
         raise
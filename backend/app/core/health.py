@@ -0,0 +1,76 @@
+"""
+Liveness and readiness checks.
+
+Readiness fails, so the load balancer stops routing to this worker, when the
+pool is close to exhausted, when waiting for a connection or running SELECT 1
+takes longer than the configured thresholds, or when the database does not
+answer before the deadline. A saturated pool is reported without running the
+probe, which would only queue for one of the last connections.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool
+
+from app.core.config import settings
+
+
+def pool_usage(pool: Pool) -> Dict[str, Any]:
+    size = pool.size()
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    checked_out = pool.checkedout()
+    # A negative max_overflow means the pool may open any number of connections
+    capacity = size + max_overflow if max_overflow >= 0 else None
+    return {
+        "size": size,
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "saturation": checked_out / capacity if capacity else 0.0
+    }
+
+
+async def _timed_select_one(engine: AsyncEngine) -> Tuple[float, float]:
+    """Milliseconds spent waiting for a connection and running SELECT 1"""
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        acquired = time.perf_counter()
+        await conn.execute(text("SELECT 1"))
+        finished = time.perf_counter()
+    return (acquired - started) * 1000, (finished - acquired) * 1000
+
+
+async def check_readiness(engine: AsyncEngine) -> Tuple[bool, Dict[str, Any]]:
+    failures: List[str] = []
+    pool = pool_usage(engine.pool)
+    database: Dict[str, Any] = {}
+
+    if pool["saturation"] >= settings.HEALTH_MAX_POOL_SATURATION:
+        failures.append(
+            f"pool saturation {pool['saturation']:.2f} >= {settings.HEALTH_MAX_POOL_SATURATION}"
+        )
+    else:
+        try:
+            wait_ms, select_ms = await asyncio.wait_for(
+                _timed_select_one(engine),
+                settings.HEALTH_DB_TIMEOUT_SECONDS
+            )
+            database = {"pool_wait_ms": round(wait_ms, 3), "select_ms": round(select_ms, 3)}
+            if wait_ms > settings.HEALTH_MAX_POOL_WAIT_MS:
+                failures.append(f"pool wait {wait_ms:.1f} ms > {settings.HEALTH_MAX_POOL_WAIT_MS} ms")
+            if select_ms > settings.HEALTH_MAX_DB_LATENCY_MS:
+                failures.append(f"SELECT 1 took {select_ms:.1f} ms > {settings.HEALTH_MAX_DB_LATENCY_MS} ms")
+        except asyncio.TimeoutError:
+            failures.append(f"database did not answer within {settings.HEALTH_DB_TIMEOUT_SECONDS} s")
+        except Exception as e:
+            failures.append(f"database error: {e}")
+
+    return not failures, {
+        "status": "ready" if not failures else "not_ready",
+        "database": database,
+        "pool": pool,
+        "failures": failures
+    }
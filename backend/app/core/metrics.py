@@ -0,0 +1,223 @@
+"""
+Prometheus metrics in the text exposition format.
+
+MetricsMiddleware records request counts and latency histograms per method,
+route template (e.g. /api/v1/invoices/{invoice_id}) and status code, and an
+in-flight gauge per method. The template is read from scope["route"], which
+the router sets while dispatching, so routes are matched only once. InstrumentedPool times connection checkouts, and the pool's size,
+checked-out and overflow gauges are read at scrape time. Values live in the
+process: with several workers, /metrics answers for the worker that accepted
+the scrape only, and nothing aggregates across workers (see app.serve).
+
+This module must not import app.core.config: config uses InstrumentedPool.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+# Requests that match no route share one label value, so random paths cannot blow up cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, labels: LabelValues, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # labels -> [count per bucket (not cumulative)..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * len(self.buckets) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        label_names = self.labelnames + ("le",)
+        for labels, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels(label_names, labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            formatted = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{formatted} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{formatted} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> List[str]:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return lines
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ("method", "route", "status")
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status code",
+    ("method", "route", "status"),
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled, by method",
+    ("method",)
+))
+db_pool_checkout_seconds = registry.register(Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool, including opening one",
+    (),
+    (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """The engine's default async pool, timing every checkout"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_seconds.observe((), time.perf_counter() - started)
+
+
+def route_template(scope) -> str:
+    """Path template of the route the request was dispatched to, once the app has run"""
+    # Also set for a method mismatch, which the router answers with 405
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses are neither buffered nor copied"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_progress_labels = (method,)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(in_progress_labels)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            http_requests_in_progress.dec(in_progress_labels)
+            labels = (method, route_template(scope), str(status_code))
+            http_requests_total.inc(labels)
+            http_request_duration_seconds.observe(labels, duration)
+
+
+def _pool_gauges(pool: Pool) -> List[str]:
+    gauges = [
+        ("db_pool_size", "Configured number of pooled connections", pool.size()),
+        ("db_pool_checked_out", "Connections currently checked out of the pool", pool.checkedout()),
+        ("db_pool_checked_in", "Idle connections in the pool", pool.checkedin()),
+        # Negative while the pool has not yet opened all of its connections
+        ("db_pool_overflow", "Connections open beyond the pool size", pool.overflow()),
+    ]
+    lines = []
+    for name, documentation, value in gauges:
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+    return lines
+
+
+def render_metrics(pool: Pool) -> str:
+    return "\n".join(registry.render() + _pool_gauges(pool)) + "\n"
@@ -0,0 +1,330 @@
+"""
+Server-side invoice PDFs.
+
+Rendering is CPU-bound reportlab work, so it runs in a ProcessPoolExecutor and
+never blocks the event loop. Each worker registers the font and builds its
+paragraph styles once, in the pool initializer. Rendered files are cached on
+disk as invoice_{id}_{sha256 of the fields that appear in the document}.pdf, so
+unchanged invoices are served straight from disk. Batch PDFs are merged from
+those per-invoice files into a temporary file, which is not cached.
+
+The cache is bounded: a hit refreshes the file's mtime, and a periodic sweep
+removes files older than the maximum age, all but the newest file of each
+invoice (older ones belong to superseded versions) and then the least recently
+used files until the directory is within its size limit.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.models.models import Invoice
+
+# Bump when the layout changes so cached files are not reused
+PDF_LAYOUT_VERSION = 1
+
+# Files touched this recently are never pruned, so a batch can still merge what it just rendered
+PRUNE_GRACE_SECONDS = 300
+
+# Per-worker state, set up by _init_worker
+_styles: Dict[str, Any] = {}
+
+
+def _init_worker(font_path: str) -> None:
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont('DejaVu', font_path))
+
+    base = getSampleStyleSheet()
+    _styles['header'] = ParagraphStyle(
+        'CustomHeader',
+        parent=base['Heading1'],
+        fontName='DejaVu',
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1
+    )
+    _styles['normal'] = ParagraphStyle(
+        'CustomNormal',
+        parent=base['Normal'],
+        fontName='DejaVu',
+        fontSize=12,
+        spaceBefore=6,
+        spaceAfter=6
+    )
+    _styles['total'] = ParagraphStyle('Total', parent=_styles['normal'], fontSize=14, alignment=2)
+
+
+def invoice_elements(invoice_data: Dict[str, Any]) -> list:
+    """Flowables of one invoice, the same layout as the client's InvoicePDFGenerator"""
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
+
+    elements = [
+        Paragraph("НАКЛАДНАЯ", _styles['header']),
+        Paragraph(f"Номер: {invoice_data['id']}", _styles['normal']),
+        Paragraph(f"Дата: {invoice_data['created_at'].split('T')[0]}", _styles['normal']),
+        Paragraph(f"Контакт: {invoice_data['contact']}", _styles['normal']),
+        Spacer(1, 0.5 * cm)
+    ]
+
+    if invoice_data['additional_info']:
+        elements.append(Paragraph("Дополнительная информация:", _styles['normal']))
+        elements.append(Paragraph(invoice_data['additional_info'], _styles['normal']))
+        elements.append(Spacer(1, 0.5 * cm))
+
+    table_data = [['№', 'Наименование', 'Количество', 'Цена', 'Сумма']]
+    for idx, item in enumerate(invoice_data['items'], 1):
+        table_data.append([
+            str(idx),
+            item['name'],
+            str(item['quantity']),
+            f"{item['price']:.2f}",
+            f"{item['total']:.2f}"
+        ])
+
+    table = Table(table_data, colWidths=[1 * cm, 8 * cm, 3 * cm, 3 * cm, 3 * cm])
+    table.setStyle(TableStyle([
+        ('FONT', (0, 0), (-1, -1), 'DejaVu'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BOX', (0, 0), (-1, -1), 2, colors.black),
+        ('LINEABOVE', (0, 1), (-1, 1), 2, colors.black),
+        ('LINEBEFORE', (1, 1), (1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+        ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
+    ]))
+
+    payment_status = "Оплачено" if invoice_data['is_paid'] else "Не оплачено"
+    elements += [
+        table,
+        Spacer(1, 0.5 * cm),
+        Paragraph(f"Итого: {invoice_data['total']:.2f}", _styles['total']),
+        Paragraph(f"Статус оплаты: {payment_status}", _styles['total'])
+    ]
+    return elements
+
+
+def _build_document(output_path: str, elements: list) -> None:
+    """Build into a temporary file and rename it, so readers never see a partial PDF"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(
+        tmp_path,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    doc.build(elements)
+    os.replace(tmp_path, output_path)
+
+
+def _render_invoice_pdf(invoice_data: Dict[str, Any], output_path: str) -> str:
+    """Runs in a worker process"""
+    _build_document(output_path, invoice_elements(invoice_data))
+    return output_path
+
+
+def _merge_pdfs(paths: List[str], output_path: str) -> str:
+    """Runs in a worker process: the pages of all files, in order, in one document"""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    with open(output_path, "wb") as output:
+        writer.write(output)
+    writer.close()
+    return output_path
+
+
+def invoice_pdf_data(invoice: Invoice) -> Dict[str, Any]:
+    """The invoice fields that appear in the PDF, as plain picklable values"""
+    return {
+        "id": invoice.id,
+        "created_at": invoice.created_at.isoformat() if invoice.created_at else "",
+        "contact": invoice.contact_info or "",
+        "additional_info": invoice.additional_info or "",
+        "items": [
+            {
+                "name": item.name,
+                "quantity": float(item.quantity),
+                "price": float(item.price),
+                "total": float(item.total)
+            }
+            for item in sorted(invoice.items, key=lambda item: item.id or 0)
+        ],
+        "total": float(invoice.total_amount or 0),
+        "is_paid": bool(invoice.is_paid)
+    }
+
+
+def pdf_content_hash(invoice_data: Dict[str, Any]) -> str:
+    payload = json.dumps([PDF_LAYOUT_VERSION, invoice_data], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def prune_pdf_cache(cache_dir: str, max_bytes: int, max_age_seconds: float) -> int:
+    """Remove expired, superseded and least recently used files; returns the number removed"""
+    now = time.time()
+    files = []
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.name, entry.path))
+    # Newest first, so the first file seen for an invoice is the one to keep
+    files.sort(reverse=True)
+
+    removed = 0
+    kept_bytes = 0
+    seen_invoices = set()
+    for mtime, size, name, path in files:
+        age = now - mtime
+        invoice_id = name.split("_")[1] if name.startswith("invoice_") and name.endswith(".pdf") else None
+        if age < PRUNE_GRACE_SECONDS:
+            keep = True
+        elif age > max_age_seconds:
+            keep = False
+        elif name.endswith(".tmp"):
+            # Left behind by a render or merge that did not finish
+            keep = False
+        else:
+            keep = invoice_id not in seen_invoices and kept_bytes + size <= max_bytes
+        if invoice_id is not None:
+            seen_invoices.add(invoice_id)
+
+        if keep:
+            kept_bytes += size
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+class PDFRenderer:
+    """Renders invoice PDFs in a process pool, created on first use, with a bounded disk cache"""
+
+    def __init__(
+            self,
+            font_path: str,
+            cache_dir: str,
+            workers: int,
+            max_cache_bytes: int,
+            max_cache_age_seconds: float,
+            prune_interval_seconds: float
+    ):
+        self.font_path = font_path
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.max_cache_bytes = max_cache_bytes
+        self.max_cache_age_seconds = max_cache_age_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._last_prune = 0.0
+        self._prune_task: Optional[asyncio.Task] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            if not os.path.exists(self.font_path):
+                raise FileNotFoundError(f"PDF font not found: {self.font_path}")
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.font_path,)
+            )
+        return self._pool
+
+    async def run(self, func, *args) -> Any:
+        """Run a module-level function in the pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    async def render_invoice(self, invoice_data: Dict[str, Any]) -> str:
+        """Path of the invoice's PDF, rendered only if no file with the same content hash exists"""
+        self._schedule_prune()
+        content_hash = pdf_content_hash(invoice_data)
+        output_path = os.path.join(self.cache_dir, f"invoice_{invoice_data['id']}_{content_hash}.pdf")
+        try:
+            # Marks the file as recently used for pruning
+            os.utime(output_path)
+            return output_path
+        except FileNotFoundError:
+            pass
+
+        # Concurrent requests for the same content share one render
+        future = self._in_flight.get(content_hash)
+        if future is None:
+            future = asyncio.ensure_future(self.run(_render_invoice_pdf, invoice_data, output_path))
+            self._in_flight[content_hash] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(content_hash, None))
+        return await asyncio.shield(future)
+
+    def _schedule_prune(self) -> None:
+        """Start a background sweep of the cache directory at most once per prune interval"""
+        now = time.monotonic()
+        if now - self._last_prune < self.prune_interval_seconds or not os.path.isdir(self.cache_dir):
+            return
+        if self._prune_task is not None and not self._prune_task.done():
+            return
+        self._last_prune = now
+        self._prune_task = asyncio.ensure_future(asyncio.to_thread(
+            prune_pdf_cache, self.cache_dir, self.max_cache_bytes, self.max_cache_age_seconds
+        ))
+        self._prune_task.add_done_callback(self._prune_done)
+
+    @staticmethod
+    def _prune_done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"PDF cache pruning failed: {task.exception()}")
+
+    async def render_invoices(self, invoices_data: List[Dict[str, Any]]) -> List[str]:
+        """Render several invoices in parallel across the pool; paths are returned in input order"""
+        return list(await asyncio.gather(*(self.render_invoice(data) for data in invoices_data)))
+
+    async def merge(self, paths: List[str]) -> str:
+        """Merge rendered PDFs into a new temporary file, which the caller removes"""
+        self.pool  # creates the cache directory on first use
+        fd, output_path = tempfile.mkstemp(prefix="batch_", suffix=".pdf.tmp", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            return await self.run(_merge_pdfs, paths, output_path)
+        except BaseException:
+            os.remove(output_path)
+            raise
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+pdf_renderer = PDFRenderer(
+    settings.PDF_FONT_PATH,
+    settings.PDF_CACHE_DIR,
+    settings.PDF_RENDER_WORKERS,
+    settings.PDF_CACHE_MAX_BYTES,
+    settings.PDF_CACHE_MAX_AGE_SECONDS,
+    settings.PDF_CACHE_PRUNE_INTERVAL_SECONDS
+)
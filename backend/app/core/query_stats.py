@@ -0,0 +1,247 @@
+"""
+Per-statement instrumentation of the database engine.
+
+Cursor execution events time every statement and tag it with the route of the
+request (set by get_db) and the innermost CRUD function marked with
+@tag_queries. Statements are grouped by shape, meaning the SQL with literals
+and the lengths of IN lists and VALUES rows normalized away. Each shape keeps
+a latency histogram. Statements slower than the threshold also go to a bounded
+slow-query log, with sampled parameters and, optionally, the EXPLAIN plan of
+the shape, which is captured once on a separate connection.
+
+This module must not import app.core.config: config installs it on the engine.
+"""
+import asyncio
+import functools
+import random
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from threading import Lock
+from typing import Any, Deque, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Set for the duration of a request by get_db and of a call by @tag_queries
+query_route: ContextVar[Optional[str]] = ContextVar("query_route", default=None)
+query_crud: ContextVar[Optional[str]] = ContextVar("query_crud", default=None)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+# Distinct statements whose shape is memoized, and distinct tags kept per shape
+SHAPE_MEMO_SIZE = 5000
+MAX_TAGS_PER_SHAPE = 20
+MAX_LOGGED_SQL_LENGTH = 2000
+MAX_LOGGED_PARAMS_LENGTH = 500
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def tag_queries(func):
+    """Attribute the statements run by an async CRUD function to it"""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = query_crud.set(name)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            query_crud.reset(token)
+
+    return wrapper
+
+
+def statement_shape(statement: str) -> str:
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(...)", shape)
+    shape = _REPEATED_LISTS.sub("(...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class ShapeStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets", "tags")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.tags: Counter = Counter()
+
+    def add(self, duration_ms: float, tag: str) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[index] += 1
+                break
+        if tag in self.tags or len(self.tags) < MAX_TAGS_PER_SHAPE:
+            self.tags[tag] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of statements"""
+        threshold = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= threshold:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self, shape: str) -> Dict[str, Any]:
+        return {
+            "shape": shape,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "histogram": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+            "tags": dict(self.tags.most_common())
+        }
+
+
+class QueryStats:
+    def __init__(self):
+        self.slow_threshold_ms = 200.0
+        self.params_sample_rate = 0.0
+        self.explain = False
+        self.statements = 0
+        self.slow_log: Deque[Dict[str, Any]] = deque(maxlen=200)
+        self._shapes: Dict[str, ShapeStats] = {}
+        self._shape_memo: Dict[str, str] = {}
+        self._explains: Dict[str, Any] = {}
+        self._explain_tasks: Set[asyncio.Task] = set()
+        self._engine: Optional[AsyncEngine] = None
+        self._lock = Lock()
+
+    def install(
+            self,
+            engine: AsyncEngine,
+            slow_threshold_ms: float,
+            slow_log_size: int,
+            params_sample_rate: float,
+            explain: bool
+    ) -> None:
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.params_sample_rate = params_sample_rate
+        self.explain = explain
+        self._engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine.sync_engine, "handle_error", self._handle_error)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @staticmethod
+    def _handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+
+        shape = self._shape_memo.get(statement)
+        if shape is None:
+            shape = statement_shape(statement)
+            if len(self._shape_memo) < SHAPE_MEMO_SIZE:
+                self._shape_memo[statement] = shape
+
+        route = query_route.get()
+        crud = query_crud.get()
+        with self._lock:
+            self.statements += 1
+            stats = self._shapes.get(shape)
+            if stats is None:
+                stats = self._shapes[shape] = ShapeStats()
+            stats.add(duration_ms, f"{route or '-'} {crud or '-'}")
+
+        if duration_ms >= self.slow_threshold_ms:
+            self._log_slow(conn, statement, parameters, executemany, shape, duration_ms, route, crud, cursor)
+
+    def _log_slow(self, conn, statement, parameters, executemany, shape, duration_ms, route, crud, cursor) -> None:
+        entry = {
+            "at": datetime.now().isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            "route": route,
+            "crud": crud,
+            "shape": shape,
+            "statement": statement[:MAX_LOGGED_SQL_LENGTH],
+            "rowcount": cursor.rowcount,
+            "params": None,
+            "explain": self._explains.get(shape)
+        }
+        if self.params_sample_rate and random.random() < self.params_sample_rate:
+            entry["params"] = repr(parameters)[:MAX_LOGGED_PARAMS_LENGTH]
+        self.slow_log.append(entry)
+        print(f"Slow query ({duration_ms:.1f} ms) [{route or '-'} {crud or '-'}]: {shape[:200]}")
+
+        if (
+                self.explain
+                and not executemany
+                and shape not in self._explains
+                and conn.dialect.name == "mysql"
+                and shape.lower().startswith("select")
+        ):
+            # Explained on another connection, once per shape; this one is mid-request
+            self._explains[shape] = None
+            task = asyncio.get_running_loop().create_task(self._capture_explain(shape, statement, parameters))
+            self._explain_tasks.add(task)
+            task.add_done_callback(self._explain_tasks.discard)
+
+    async def _capture_explain(self, shape: str, statement: str, parameters) -> None:
+        query_crud.set("query_stats.explain")
+        try:
+            async with self._engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                plan = [dict(row) for row in result.mappings().all()]
+        except Exception as e:
+            plan = [{"error": str(e)}]
+        self._explains[shape] = plan
+        for entry in self.slow_log:
+            if entry["shape"] == shape and entry["explain"] is None:
+                entry["explain"] = plan
+
+    def snapshot(self, limit: int = 50, order_by: str = "total_ms") -> Dict[str, Any]:
+        with self._lock:
+            shapes = [stats.to_dict(shape) for shape, stats in self._shapes.items()]
+            statements = self.statements
+        shapes.sort(key=lambda item: item[order_by], reverse=True)
+        return {
+            "statements": statements,
+            "distinct_shapes": len(shapes),
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "shapes": shapes[:limit],
+            "slow_queries": list(reversed(self.slow_log))[:limit]
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements = 0
+            self._shapes.clear()
+            self._explains.clear()
+            self.slow_log.clear()
+
+
+query_stats = QueryStats()
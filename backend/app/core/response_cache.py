@@ -0,0 +1,295 @@
+"""
+Response cache for stats and invoice list endpoints.
+
+Entries are keyed by the endpoint, a version string read from the database
+and the normalized request parameters. The version is the list_version of every
+shop the response covers (or the list ETag, which is derived from them). Invoice
+writes bump list_version in the same transaction, so after a write commits every
+worker looks up a new key and never serves what it cached before; orphaned
+entries simply age out through the TTL and LRU eviction. Backends hold no
+version state of their own.
+
+Backends:
+    memory  in-process LRU bounded by RESPONSE_CACHE_MAX_BYTES; each worker
+            keeps its own copy.
+    redis   any server speaking the Redis protocol (RESP), shared by all
+            workers. Talks RESP directly over asyncio streams.
+    none    caching disabled.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from fastapi import Response
+
+from app.core.config import settings
+from app.core.serialization import json_response
+
+class MemoryBackend:
+    """LRU of byte strings with per-entry expiry and accounting of stored bytes"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= len(key) + len(entry[1])
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._get(key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        self._delete(key)
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        self._entries[key] = (expires_at, value)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._delete(oldest)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "max_bytes": self.max_bytes
+        }
+
+
+class RedisError(Exception):
+    pass
+
+
+class _RespConnection:
+    """One connection speaking RESP2; commands are sent and answered one at a time"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @staticmethod
+    def _encode(args: Iterable[Any]) -> bytes:
+        parts = []
+        args = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        parts.append(b"*%d\r\n" % len(args))
+        for arg in args:
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise RedisError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await self.reader.readexactly(length + 2))[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def command(self, *args: Any) -> Any:
+        self.writer.write(self._encode(args))
+        await self.writer.drain()
+        return await self._read_reply()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RedisBackend:
+    """Minimal Redis-protocol client with a small connection pool"""
+
+    name = "redis"
+
+    def __init__(self, url: str, pool_size: int = 4):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.pool_size = pool_size
+        self._idle: List[_RespConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> _RespConnection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = _RespConnection(reader, writer)
+        if self.password:
+            await connection.command("AUTH", self.password)
+        if self.db:
+            await connection.command("SELECT", self.db)
+        return connection
+
+    async def _command(self, *args: Any) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else await self._connect()
+            try:
+                reply = await connection.command(*args)
+            except RedisError:
+                # Error reply: the connection itself is still usable
+                self._idle.append(connection)
+                raise
+            except BaseException:
+                # Broken or cancelled mid-reply; the next command opens a new connection
+                connection.close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._command("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int] = None) -> None:
+        if ttl_seconds:
+            await self._command("SET", key, value, "EX", ttl_seconds)
+        else:
+            await self._command("SET", key, value)
+
+    async def stats(self) -> Dict[str, Any]:
+        info = (await self._command("INFO", "memory")).decode()
+        memory = dict(
+            line.split(":", 1) for line in info.splitlines() if ":" in line
+        )
+        return {
+            "backend": self.name,
+            "entries": await self._command("DBSIZE"),
+            "bytes": int(memory.get("used_memory", 0)),
+            "max_bytes": int(memory.get("maxmemory", 0))
+        }
+
+
+class ResponseCache:
+    """Versioned cache of serialized JSON responses; backend errors count as misses"""
+
+    def __init__(self, backend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def key(namespace: str, version: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps([version, params], sort_keys=True, default=str)
+        return f"rc:{namespace}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    async def get(
+            self,
+            namespace: str,
+            version: str,
+            params: Dict[str, Any]
+    ) -> Tuple[Optional[bytes], Optional[str]]:
+        """Cached value and its key; the key is None when the cache is unusable"""
+        if not self.enabled:
+            return None, None
+        key = self.key(namespace, version, params)
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            print(f"Response cache read failed: {e}")
+            return None, None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value, key
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self.backend.set(key, value, self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            print(f"Response cache write failed: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+        if self.enabled:
+            try:
+                stats.update(await self.backend.stats())
+            except Exception as e:
+                stats["backend_error"] = str(e)
+        return stats
+
+
+async def cached_json_response(
+        namespace: str,
+        version: str,
+        params: Dict[str, Any],
+        build: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]
+) -> Response:
+    """
+    Serve a JSON response from the cache, or build it with ``build()`` (which
+    returns the content and extra headers) and store it. ``version`` must come
+    from the database (see fetch_shop_list_versions), read in the same request.
+    """
+    cached, key = await response_cache.get(namespace, version, params)
+    if cached is not None:
+        header_line, body = cached.split(b"\n", 1)
+        return Response(content=body, media_type="application/json", headers=json.loads(header_line))
+
+    content, headers = await build()
+    response = json_response(content, headers=headers)
+    if key is not None:
+        await response_cache.set(key, json.dumps(headers).encode() + b"\n" + response.body)
+    return response
+
+
+def _create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_MAX_BYTES)
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.RESPONSE_CACHE_REDIS_URL)
+    return None
+
+
+response_cache = ResponseCache(_create_backend(), settings.RESPONSE_CACHE_TTL_SECONDS)
@@ -0,0 +1,77 @@
+import math
+import re
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens of a text"""
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index of invoice texts, used when the database has no
+    FULLTEXT support. Query tokens match indexed terms by prefix and documents
+    are ranked by the sum of tf * idf over the matched terms.
+
+    The index is rebuilt from the database on the first search after any write
+    marked it stale, which is cheap enough for the small test databases it serves.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: List[str] = []
+        self._shops: Dict[int, int] = {}
+        self._lock = Lock()
+        self.stale = True
+
+    def mark_stale(self) -> None:
+        self.stale = True
+
+    def build(self, documents: Iterable[Tuple[int, int, str]]) -> None:
+        """Replace the index with (invoice_id, shop_id, text) documents"""
+        postings: Dict[str, Dict[int, int]] = {}
+        shops: Dict[int, int] = {}
+        for invoice_id, shop_id, text in documents:
+            shops[invoice_id] = shop_id
+            for token in tokenize(text):
+                counts = postings.setdefault(token, {})
+                counts[invoice_id] = counts.get(invoice_id, 0) + 1
+
+        with self._lock:
+            self._postings = postings
+            self._terms = sorted(postings)
+            self._shops = shops
+            self.stale = False
+
+    def _prefixed_terms(self, prefix: str) -> List[str]:
+        start = bisect_left(self._terms, prefix)
+        terms = []
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, shop_ids: FrozenSet[int]) -> List[Tuple[int, float]]:
+        """(invoice_id, score) pairs in the given shops, best match first"""
+        with self._lock:
+            total_documents = len(self._shops) or 1
+            scores: Dict[int, float] = {}
+            for token in set(tokenize(query)):
+                for term in self._prefixed_terms(token):
+                    counts = self._postings[term]
+                    idf = math.log(1 + total_documents / len(counts))
+                    for invoice_id, count in counts.items():
+                        if self._shops.get(invoice_id) in shop_ids:
+                            scores[invoice_id] = scores.get(invoice_id, 0.0) + count * idf
+
+        return sorted(scores.items(), key=lambda hit: (-hit[1], -hit[0]))
+
+
+# Fallback index over invoice contact_info and item names
+invoice_search_index = InvertedIndex()
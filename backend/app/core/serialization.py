@@ -0,0 +1,45 @@
+"""
+JSON encoding of responses.
+
+With FAST_JSON_RESPONSES enabled, hot read endpoints build plain dicts straight
+from the loaded ORM objects instead of validating trusted database data field by
+field through the response models, and encode them directly to bytes. orjson is
+used when it is installed; otherwise the standard library encoder produces the
+same output.
+"""
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, byte for byte what JSONResponse renders"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response of already JSON-ready content, through the fast encoder when enabled"""
+    response_class = FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+    return response_class(content, headers=headers)
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional
+
+from sqlalchemy import select, Select
+
+from app.core.config import async_session_factory
+from app.core.query_stats import query_crud
+from app.crud.invoice_crud import apply_invoice_filters
+from app.models.models import Invoice, InvoiceItem
+from app.schemas.schemas import InvoiceFilter
+
+INVOICE_EXPORT_FIELDS = [
+    "id", "created_at", "shop_id", "user_id", "contact_info", "additional_info", "total_amount", "is_paid"
+]
+ITEM_EXPORT_FIELDS = ["item_id", "item_name", "item_quantity", "item_price", "item_total"]
+
+
+def build_invoice_export_query(
+        filters: InvoiceFilter,
+        accessible_shops: FrozenSet[int],
+        include_items: bool
+) -> Select:
+    """
+    Export query in the list order. With items, invoices are outer-joined to
+    their items, so the rows of one invoice are consecutive.
+    Raises 403 up front if the filter names a shop the user cannot access.
+    """
+    columns = [getattr(Invoice, field) for field in INVOICE_EXPORT_FIELDS]
+    order_by = [Invoice.created_at.desc(), Invoice.id.desc()]
+
+    if include_items:
+        columns += [
+            InvoiceItem.id.label("item_id"),
+            InvoiceItem.name.label("item_name"),
+            InvoiceItem.quantity.label("item_quantity"),
+            InvoiceItem.price.label("item_price"),
+            InvoiceItem.total.label("item_total")
+        ]
+        order_by.append(InvoiceItem.id)
+
+    query = select(*columns)
+    if include_items:
+        query = query.outerjoin(InvoiceItem, InvoiceItem.invoice_id == Invoice.id)
+
+    query = apply_invoice_filters(query, filters, accessible_shops)
+    return query.order_by(*order_by)
+
+
+def _invoice_record(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "shop_id": row.shop_id,
+        "user_id": row.user_id,
+        "contact_info": row.contact_info,
+        "additional_info": row.additional_info,
+        "total_amount": float(row.total_amount or 0),
+        "is_paid": bool(row.is_paid)
+    }
+
+
+def _item_record(row) -> Optional[Dict[str, Any]]:
+    if row.item_id is None:
+        return None
+    return {
+        "item_id": row.item_id,
+        "item_name": row.item_name,
+        "item_quantity": float(row.item_quantity),
+        "item_price": float(row.item_price),
+        "item_total": float(row.item_total)
+    }
+
+
+def _nested_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key[len("item_"):]: value for key, value in item.items()}
+
+
+def _encode_csv(records: List[Dict[str, Any]], fields: List[str], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+def _encode_ndjson(records: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+async def stream_invoice_export(
+        query: Select,
+        export_format: str,
+        flatten_items: bool,
+        chunk_size: int
+) -> AsyncIterator[str]:
+    """
+    Yield the export as text chunks of about chunk_size database rows each.
+
+    Rows are read through a server-side cursor (session.stream with yield_per),
+    so memory stays bounded by one chunk regardless of the export size. The
+    generator opens its own session because the request's session is closed
+    before the response body is streamed.
+    """
+    # Generators cannot use @tag_queries; the tag lasts until the response is done
+    query_crud.set("export_crud.stream_invoice_export")
+    include_items = flatten_items or export_format == "ndjson"
+    fields = INVOICE_EXPORT_FIELDS + (ITEM_EXPORT_FIELDS if flatten_items else [])
+
+    if export_format == "csv":
+        yield _encode_csv([], fields, header=True)
+
+    async with async_session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+
+        # Nested NDJSON: an invoice may straddle two partitions, so hold it until its rows end
+        pending: Optional[Dict[str, Any]] = None
+
+        async for partition in result.partitions():
+            records = []
+            for row in partition:
+                if flatten_items or not include_items:
+                    record = _invoice_record(row)
+                    if flatten_items:
+                        record.update(_item_record(row) or dict.fromkeys(ITEM_EXPORT_FIELDS))
+                    records.append(record)
+                    continue
+
+                if pending is None or pending["id"] != row.id:
+                    if pending is not None:
+                        records.append(pending)
+                    pending = {**_invoice_record(row), "items": []}
+                item = _item_record(row)
+                if item is not None:
+                    pending["items"].append(_nested_item(item))
+
+            if records:
+                yield _encode_csv(records, fields) if export_format == "csv" else _encode_ndjson(records)
+
+        if pending is not None:
+            yield _encode_ndjson([pending])
@@ -1,88 +1,298 @@
-from typing import List
+import base64
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 from fastapi import HTTPException
-from sqlalchemy import select, and_, delete
+from sqlalchemy import select, and_, or_, insert, update, text, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
+from app.core.cache import shop_membership_cache
+from app.core.query_stats import tag_queries
+from app.core.search_index import invoice_search_index
+from app.crud.stats_crud import StatsDeltas, add_invoice_stats_delta, apply_invoice_stats_deltas
 from app.models.models import users_shops, User, Invoice, InvoiceItem, Shop
-from app.schemas.schemas import InvoiceCreate, InvoiceUpdate, InvoiceFilter
+from app.schemas.schemas import InvoiceCreate, InvoiceUpdate, InvoiceFilter, InvoiceItemUpdate, InvoiceBulkResult
 
+# Columns needed by invoice lists (the client's history screen)
+INVOICE_SUMMARY_COLUMNS = (
+    Invoice.id,
+    Invoice.created_at,
+    Invoice.contact_info,
+    Invoice.total_amount,
+    Invoice.is_paid,
+    Invoice.shop_id,
+)
 
+
+# @@auto_increment_increment of the MySQL server, read once per process
+_auto_increment_step: Optional[int] = None
+
+
+async def multi_row_insert_ids(session: AsyncSession, result, row_count: int) -> List[int]:
+    """
+    Ids assigned to the rows of one multi-row INSERT ... VALUES, in VALUES order.
+
+    There is no INSERT ... RETURNING on MySQL. A multi-row INSERT of known length
+    gets its ids as one consecutive run spaced by auto_increment_increment; MySQL
+    reports the first of them, SQLite the last.
+    """
+    global _auto_increment_step
+    if session.bind.dialect.name != "mysql":
+        last_id = result.lastrowid
+        return list(range(last_id - row_count + 1, last_id + 1))
+
+    if _auto_increment_step is None:
+        _auto_increment_step = int((await session.execute(text("SELECT @@auto_increment_increment"))).scalar_one())
+    first_id = result.lastrowid
+    return [first_id + offset * _auto_increment_step for offset in range(row_count)]
+
+
+@tag_queries
 async def insert_invoice(
         session: AsyncSession,
         invoice_data: InvoiceCreate,
         current_user: User
 ) -> Invoice:
-    async with session.begin_nested():
-
-        has_access = await check_user_shop_access(
-            session,
-            current_user.id,
-            invoice_data.shop_id
+    """
+    Create an invoice in as few round trips as possible: one query checks that
+    the shop exists and the user is assigned to it, the invoice and all of its
+    items are written with one INSERT each, and the response object is built
+    from the data in hand instead of re-reading it.
+    """
+    shop_query = select(
+        Shop.id,
+        Shop.name,
+        Shop.photo,
+        Shop.is_active,
+        users_shops.c.user_id.label("member_id")
+    ).outerjoin(
+        users_shops,
+        and_(
+            users_shops.c.shop_id == Shop.id,
+            users_shops.c.user_id == current_user.id
         )
-        if not has_access:
-            raise HTTPException(status_code=403, detail="No access to this shop")
+    ).where(Shop.id == invoice_data.shop_id)
+
+    shop_row = (await session.execute(shop_query)).first()
+
+    if not shop_row:
+        raise HTTPException(status_code=404, detail="Shop not found")
+    if shop_row.member_id is None:
+        raise HTTPException(status_code=403, detail="No access to this shop")
+
+    # Set explicitly (whole seconds, as stored by DATETIME) so the response needs no re-read
+    created_at = datetime.now().replace(microsecond=0)
+
+    invoice_values = {
+        "created_at": created_at,
+        "shop_id": invoice_data.shop_id,
+        "user_id": current_user.id,
+        "contact_info": invoice_data.contact_info,
+        "additional_info": invoice_data.additional_info,
+        "total_amount": invoice_data.total_amount,
+        "is_paid": invoice_data.is_paid
+    }
+    result = await session.execute(insert(Invoice).values(**invoice_values))
+    invoice_id = result.inserted_primary_key[0]
+
+    item_rows = [
+        {
+            "invoice_id": invoice_id,
+            "name": item_data.name,
+            "quantity": item_data.quantity,
+            "price": item_data.price,
+            "total": item_data.total
+        }
+        for item_data in invoice_data.items
+    ]
+    if item_rows:
+        # One multi-row INSERT, whose ids are known without reading them back
+        items_result = await session.execute(insert(InvoiceItem).values(item_rows))
+        item_ids = await multi_row_insert_ids(session, items_result, len(item_rows))
+        for item_row, item_id in zip(item_rows, item_ids):
+            item_row["id"] = item_id
+
+    deltas: StatsDeltas = {}
+    add_invoice_stats_delta(deltas, invoice_data.shop_id, created_at, invoice_data.total_amount, invoice_data.is_paid)
+    await apply_invoice_stats_deltas(session, deltas)
+    await bump_shop_list_versions(session, [invoice_data.shop_id])
 
-        shop_query = select(Shop).where(Shop.id == invoice_data.shop_id)
-        shop_result = await session.execute(shop_query)
-        shop = shop_result.scalar_one_or_none()
+    await session.commit()
+    invoice_search_index.mark_stale()
+
+    # Transient objects shaped like the persisted rows; never added to the session
+    shop = Shop(
+        id=shop_row.id,
+        name=shop_row.name,
+        photo=shop_row.photo,
+        is_active=shop_row.is_active
+    )
+    return Invoice(
+        id=invoice_id,
+        shop=shop,
+        items=[InvoiceItem(**item_row) for item_row in item_rows],
+        **invoice_values
+    )
 
-        if not shop:
-            raise HTTPException(status_code=404, detail="Shop not found")
 
-        new_invoice = Invoice(
-            shop_id=invoice_data.shop_id,
-            user_id=current_user.id,
-            contact_info=invoice_data.contact_info,
-            additional_info=invoice_data.additional_info,
-            total_amount=invoice_data.total_amount,
-            is_paid=invoice_data.is_paid
-        )
+# Rows per multi-row INSERT of invoice headers, and per executemany of items, in a bulk import
+BULK_INVOICE_CHUNK_SIZE = 1000
+BULK_ITEM_CHUNK_SIZE = 1000
 
-        session.add(new_invoice)
-        await session.flush()
 
-        if hasattr(invoice_data, 'items'):
-            for item_data in invoice_data.items:
-                item = InvoiceItem(
-                    invoice_id=new_invoice.id,
-                    name=item_data.name,
-                    quantity=item_data.quantity,
-                    price=item_data.price,
-                    total=item_data.total
-                )
-                session.add(item)
+@tag_queries
+async def insert_invoices_bulk(
+        session: AsyncSession,
+        invoices_data: List[InvoiceCreate],
+        current_user: User,
+        atomic: bool = True
+) -> List[InvoiceBulkResult]:
+    """
+    Create many invoices in one transaction.
+
+    Shop existence and access are checked with a single query for all distinct
+    shop_ids. In atomic mode any rejected invoice aborts the whole batch with a
+    400; otherwise rejected invoices are reported and the rest are created.
+    """
+    shop_ids = {invoice_data.shop_id for invoice_data in invoices_data}
+    shops_query = select(
+        Shop.id,
+        users_shops.c.user_id.label("member_id")
+    ).outerjoin(
+        users_shops,
+        and_(
+            users_shops.c.shop_id == Shop.id,
+            users_shops.c.user_id == current_user.id
+        )
+    ).where(Shop.id.in_(sorted(shop_ids)))
 
-    await session.commit()
+    result = await session.execute(shops_query)
+    shop_access = {row.id: row.member_id is not None for row in result}
+
+    results: List[InvoiceBulkResult] = []
+    accepted = []
+    for index, invoice_data in enumerate(invoices_data):
+        if invoice_data.shop_id not in shop_access:
+            results.append(InvoiceBulkResult(index=index, status="rejected", error="Shop not found"))
+        elif not shop_access[invoice_data.shop_id]:
+            results.append(InvoiceBulkResult(index=index, status="rejected", error="No access to this shop"))
+        else:
+            result_entry = InvoiceBulkResult(index=index, status="created")
+            results.append(result_entry)
+            accepted.append((result_entry, invoice_data))
+
+    if atomic and len(accepted) != len(invoices_data):
+        raise HTTPException(
+            status_code=400,
+            detail=[entry.model_dump() for entry in results if entry.status == "rejected"]
+        )
 
-    query = select(Invoice).options(
-        selectinload(Invoice.shop),
-        selectinload(Invoice.items)
-    ).where(
-        Invoice.id == new_invoice.id
-    )
+    created_at = datetime.now().replace(microsecond=0)
+    item_rows = []
+    deltas: StatsDeltas = {}
+    for start in range(0, len(accepted), BULK_INVOICE_CHUNK_SIZE):
+        chunk = accepted[start:start + BULK_INVOICE_CHUNK_SIZE]
+        insert_result = await session.execute(insert(Invoice).values([
+            {
+                "created_at": created_at,
+                "shop_id": invoice_data.shop_id,
+                "user_id": current_user.id,
+                "contact_info": invoice_data.contact_info,
+                "additional_info": invoice_data.additional_info,
+                "total_amount": invoice_data.total_amount,
+                "is_paid": invoice_data.is_paid
+            }
+            for _, invoice_data in chunk
+        ]))
+        # There is no INSERT ... RETURNING on MySQL, and the ids of one statement need not
+        # be consecutive (auto_increment_increment > 1 on Galera or group replication,
+        # interleaved allocation under innodb_autoinc_lock_mode=2). They do increase in
+        # VALUES order from the first one, which MySQL reports (SQLite reports the last),
+        # so the chunk's rows are read back in id order
+        first_id = insert_result.lastrowid
+        if session.bind.dialect.name != "mysql":
+            first_id -= len(chunk) - 1
+        ids_query = select(Invoice.id).where(
+            Invoice.id >= first_id,
+            Invoice.user_id == current_user.id,
+            Invoice.created_at == created_at
+        ).order_by(Invoice.id).limit(len(chunk))
+        chunk_ids = (await session.execute(ids_query)).scalars().all()
+        if len(chunk_ids) != len(chunk):
+            raise HTTPException(status_code=500, detail="Could not read back the ids of created invoices")
+
+        for invoice_id, (result_entry, invoice_data) in zip(chunk_ids, chunk):
+            result_entry.id = invoice_id
+            add_invoice_stats_delta(
+                deltas, invoice_data.shop_id, created_at, invoice_data.total_amount, invoice_data.is_paid
+            )
+            item_rows.extend(
+                {
+                    "invoice_id": result_entry.id,
+                    "name": item_data.name,
+                    "quantity": item_data.quantity,
+                    "price": item_data.price,
+                    "total": item_data.total
+                }
+                for item_data in invoice_data.items
+            )
 
-    result = await session.execute(query)
-    invoice = result.unique().scalar_one()
+    for start in range(0, len(item_rows), BULK_ITEM_CHUNK_SIZE):
+        await session.execute(insert(InvoiceItem), item_rows[start:start + BULK_ITEM_CHUNK_SIZE])
 
-    return invoice
+    await apply_invoice_stats_deltas(session, deltas)
+    await bump_shop_list_versions(session, {invoice_data.shop_id for _, invoice_data in accepted})
+    await session.commit()
+    invoice_search_index.mark_stale()
+    return results
+
+
+@tag_queries
+async def bump_shop_list_versions(session: AsyncSession, shop_ids) -> None:
+    """Invalidate the list ETags of the given shops"""
+    if shop_ids:
+        await session.execute(
+            update(Shop)
+            .where(Shop.id.in_(sorted(shop_ids)))
+            .values(list_version=Shop.list_version + 1)
+            .execution_options(synchronize_session=False)
+        )
 
 
+@tag_queries
 async def check_user_shop_access(
         session: AsyncSession,
-        user_id: int,
+        user: User,
         shop_id: int
 ) -> bool:
-    query = select(users_shops).where(
-        and_(
-            users_shops.c.user_id == user_id,
-            users_shops.c.shop_id == shop_id
-        )
+    return shop_id in await get_user_shop_ids(session, user)
+
+
+@tag_queries
+async def get_user_shop_ids(session: AsyncSession, user: User) -> FrozenSet[int]:
+    """
+    Get IDs of all shops the user is assigned to, served from the membership cache
+    while the user's auth_version (as loaded by get_current_user, at most the user
+    cache TTL old) is unchanged
+    """
+    shop_ids = shop_membership_cache.get(user.id, user.auth_version)
+    if shop_ids is not None:
+        return shop_ids
+
+    version = shop_membership_cache.version
+    shops_query = select(users_shops.c.shop_id).where(
+        users_shops.c.user_id == user.id
     )
-    result = await session.execute(query)
-    return result.first() is not None
+    result = await session.execute(shops_query)
+    shop_ids = frozenset(row[0] for row in result.fetchall())
 
+    shop_membership_cache.set(user.id, shop_ids, version, user.auth_version)
+    return shop_ids
 
+
+@tag_queries
 async def update_invoice_db(
         session: AsyncSession,
         invoice_id: int,
@@ -90,10 +300,12 @@ async def update_invoice_db(
         current_user: User
 ) -> Invoice:
     async with session.begin_nested():
+        # Locked until commit so the stats deltas below start from the values being replaced,
+        # as in update_invoices_status_bulk
         query = select(Invoice).options(
             selectinload(Invoice.items),
             selectinload(Invoice.shop)
-        ).where(Invoice.id == invoice_id)
+        ).where(Invoice.id == invoice_id).with_for_update().execution_options(populate_existing=True)
 
         result = await session.execute(query)
         invoice = result.scalar_one_or_none()
@@ -103,6 +315,12 @@ async def update_invoice_db(
 
         if not current_user.is_superuser:
             raise HTTPException(status_code=403, detail="Only admins can update invoices")
+
+        deltas: StatsDeltas = {}
+        add_invoice_stats_delta(
+            deltas, invoice.shop_id, invoice.created_at, invoice.total_amount, invoice.is_paid, sign=-1
+        )
+
         if invoice_data.contact_info is not None:
             invoice.contact_info = invoice_data.contact_info
         if invoice_data.additional_info is not None:
@@ -111,38 +329,161 @@ async def update_invoice_db(
             invoice.is_paid = invoice_data.is_paid
 
         if invoice_data.items:
-            delete_stmt = delete(InvoiceItem).where(
-                InvoiceItem.invoice_id == invoice_id
-            )
-            await session.execute(delete_stmt)
-
-            total_amount = 0
-            for item_data in invoice_data.items:
-                item = InvoiceItem(
-                    invoice_id=invoice.id,
-                    name=item_data.name,
-                    quantity=item_data.quantity,
-                    price=item_data.price,
-                    total=item_data.quantity * item_data.price
-                )
-                total_amount += item.total
-                session.add(item)
-
-            invoice.total_amount = total_amount
+            if merge_invoice_items(invoice, invoice_data.items):
+                total_amount = round(sum(float(item.total) for item in invoice.items), 2)
+                if round(float(invoice.total_amount or 0), 2) != total_amount:
+                    invoice.total_amount = total_amount
+
+        add_invoice_stats_delta(deltas, invoice.shop_id, invoice.created_at, invoice.total_amount, invoice.is_paid)
+        await apply_invoice_stats_deltas(session, deltas)
+
+        # Incremented in SQL so concurrent updates never end up with the same version
+        invoice.version = Invoice.version + 1
+        await bump_shop_list_versions(session, [invoice.shop_id])
 
     await session.commit()
+    invoice_search_index.mark_stale()
 
-    refresh_query = select(Invoice).options(
-        selectinload(Invoice.items),
-        selectinload(Invoice.shop)
-    ).where(Invoice.id == invoice_id)
+    # The identity-mapped invoice already reflects the merge (new items got their ids on flush)
+    return invoice
 
-    result = await session.execute(refresh_query)
-    updated_invoice = result.unique().scalar_one()
 
-    return updated_invoice
+def _item_values(name: str, quantity: float, price: float) -> Tuple[str, float, float, float]:
+    """Item values normalized to the precision of the invoice_items columns"""
+    quantity = round(float(quantity), 3)
+    price = round(float(price), 2)
+    return name, quantity, price, round(quantity * price, 2)
+
+
+def _apply_item_update(item: InvoiceItem, item_data: InvoiceItemUpdate) -> bool:
+    """Copy changed fields onto a stored item; returns True if anything differed"""
+    name, quantity, price, total = _item_values(item_data.name, item_data.quantity, item_data.price)
+    changed = False
+    if item.name != name:
+        item.name = name
+        changed = True
+    if round(float(item.quantity), 3) != quantity:
+        item.quantity = quantity
+        changed = True
+    if round(float(item.price), 2) != price:
+        item.price = price
+        changed = True
+    if round(float(item.total), 2) != total:
+        item.total = total
+        changed = True
+    return changed
+
+
+def merge_invoice_items(invoice: Invoice, items_data: List[InvoiceItemUpdate]) -> bool:
+    """
+    Reconcile invoice.items with the incoming list, touching only rows that differ.
+
+    Incoming items with an id update that row. Items without an id are first
+    matched by content to stored rows, so resending the stored list is a no-op;
+    the rest reuse leftover rows (UPDATE) before new rows are added (INSERT).
+    Stored rows that remain unmatched are removed (DELETE via delete-orphan).
+    Returns True if any item changed.
+    """
+    unmatched = {item.id: item for item in invoice.items}
+    changed = False
+
+    without_id = []
+    for item_data in items_data:
+        item = unmatched.pop(item_data.id, None) if item_data.id is not None else None
+        if item is not None:
+            changed |= _apply_item_update(item, item_data)
+        else:
+            without_id.append(item_data)
+
+    by_content: Dict[Tuple, List[InvoiceItem]] = {}
+    for item in unmatched.values():
+        key = _item_values(item.name, item.quantity, item.price)
+        by_content.setdefault(key, []).append(item)
+
+    to_place = []
+    for item_data in without_id:
+        candidates = by_content.get(_item_values(item_data.name, item_data.quantity, item_data.price))
+        if candidates:
+            del unmatched[candidates.pop().id]
+        else:
+            to_place.append(item_data)
+
+    leftovers = list(unmatched.values())
+    for item_data in to_place:
+        if leftovers:
+            changed |= _apply_item_update(leftovers.pop(), item_data)
+        else:
+            name, quantity, price, total = _item_values(item_data.name, item_data.quantity, item_data.price)
+            invoice.items.append(InvoiceItem(name=name, quantity=quantity, price=price, total=total))
+            changed = True
+
+    for item in leftovers:
+        invoice.items.remove(item)
+        changed = True
+
+    return changed
+
+
+@tag_queries
+async def update_invoices_status_bulk(
+        session: AsyncSession,
+        current_user: User,
+        is_paid: bool,
+        invoice_ids: Optional[List[int]] = None,
+        filters: Optional[InvoiceFilter] = None
+) -> List[int]:
+    """
+    Set the payment status of many invoices with one set-based UPDATE.
+
+    Shop access is enforced in SQL through a users_shops subquery. The matching
+    rows are locked and their ids collected first, since MySQL cannot return
+    the ids touched by an UPDATE. Returns the ids whose status changed.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only admins can update invoices")
+    if not invoice_ids and filters is None:
+        raise HTTPException(status_code=400, detail="Either ids or filter is required")
+
+    accessible_shops = select(users_shops.c.shop_id).where(
+        users_shops.c.user_id == current_user.id
+    )
+    query = select(Invoice.id, Invoice.shop_id, Invoice.created_at, Invoice.total_amount).where(
+        Invoice.shop_id.in_(accessible_shops),
+        Invoice.is_paid != is_paid
+    )
+    if invoice_ids:
+        query = query.where(Invoice.id.in_(invoice_ids))
+    if filters is not None:
+        query = query.where(*invoice_filter_conditions(filters))
+
+    result = await session.execute(query.with_for_update())
+    rows = result.all()
+    updated_ids = [row.id for row in rows]
+
+    if updated_ids:
+        await session.execute(
+            update(Invoice)
+            .where(Invoice.id.in_(updated_ids))
+            .values(is_paid=is_paid, version=Invoice.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await bump_shop_list_versions(session, {row.shop_id for row in rows})
 
+        # Only the paid columns of the rollup move when the status flips
+        deltas: StatsDeltas = {}
+        sign = 1 if is_paid else -1
+        for row in rows:
+            delta = deltas.setdefault((row.shop_id, row.created_at.date()), [0, 0.0, 0, 0.0])
+            delta[2] += sign
+            delta[3] += sign * float(row.total_amount or 0)
+        await apply_invoice_stats_deltas(session, deltas)
 
+    await session.commit()
+
+    return updated_ids
+
+
+@tag_queries
 async def delete_invoice_db(
         session: AsyncSession,
         invoice_id: int,
@@ -159,11 +500,20 @@ async def delete_invoice_db(
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Only admins can delete invoices")
 
+    deltas: StatsDeltas = {}
+    add_invoice_stats_delta(
+        deltas, invoice.shop_id, invoice.created_at, invoice.total_amount, invoice.is_paid, sign=-1
+    )
+    await apply_invoice_stats_deltas(session, deltas)
+    await bump_shop_list_versions(session, [invoice.shop_id])
+
     await session.delete(invoice)
     await session.commit()
+    invoice_search_index.mark_stale()
     return True
 
 
+@tag_queries
 async def fetch_invoice(
         session: AsyncSession,
         invoice_id: int,
@@ -181,57 +531,154 @@ async def fetch_invoice(
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
-    has_access = await check_user_shop_access(session, current_user.id, invoice.shop_id)
+    has_access = await check_user_shop_access(session, current_user, invoice.shop_id)
     if not has_access:
         raise HTTPException(status_code=403, detail="No access to this invoice")
 
     return invoice
 
 
-async def fetch_invoices_with_filters(
-        session: AsyncSession,
-        current_user: User,
-        filters: InvoiceFilter,
-        skip: int = 0,
-        limit: int = 100
-) -> List[Invoice]:
-    query = select(Invoice).options(
-        joinedload(Invoice.items),
-        joinedload(Invoice.shop),
-        joinedload(Invoice.user)
-    )
+@tag_queries
+async def fetch_invoice_etag(session: AsyncSession, invoice_id: int, current_user: User) -> str:
+    """Strong ETag of one invoice, from its version column, without loading the invoice"""
+    query = select(Invoice.shop_id, Invoice.version).where(Invoice.id == invoice_id)
+    row = (await session.execute(query)).first()
 
-    shops_query = select(users_shops.c.shop_id).where(
-        users_shops.c.user_id == current_user.id
+    if not row:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+
+    has_access = await check_user_shop_access(session, current_user, row.shop_id)
+    if not has_access:
+        raise HTTPException(status_code=403, detail="No access to this invoice")
+
+    return f'"invoice-{invoice_id}-{row.version}"'
+
+
+@tag_queries
+async def fetch_shop_list_versions(session: AsyncSession, shop_ids) -> str:
+    """The list_version of each shop, as one string that changes with any invoice write to them"""
+    if not shop_ids:
+        return "[]"
+    result = await session.execute(
+        select(Shop.id, Shop.list_version).where(Shop.id.in_(sorted(shop_ids))).order_by(Shop.id)
     )
-    result = await session.execute(shops_query)
-    accessible_shops = [row[0] for row in result.fetchall()]
+    return json.dumps([list(row) for row in result.all()])
 
-    query = query.where(Invoice.shop_id.in_(accessible_shops))
 
+@tag_queries
+async def fetch_invoice_list_etag(
+        session: AsyncSession,
+        current_user: User,
+        filters: InvoiceFilter,
+        page: Tuple
+) -> str:
+    """
+    Strong ETag of an invoice list page: a hash of the list versions of the shops
+    in scope, the filters and the page parameters. Any write to one of those
+    shops' invoices bumps its list_version and so changes the ETag.
+    """
+    accessible_shops = await get_user_shop_ids(session, current_user)
     if filters.shop_id:
         if filters.shop_id not in accessible_shops:
             raise HTTPException(status_code=403, detail="No access to this shop")
-        query = query.where(Invoice.shop_id == filters.shop_id)
+        shop_ids = [filters.shop_id]
+    else:
+        shop_ids = sorted(accessible_shops)
+
+    versions = await fetch_shop_list_versions(session, shop_ids)
+    payload = json.dumps([versions, filters.model_dump(mode="json"), list(page)], sort_keys=True)
+    return f'"invoices-{hashlib.sha256(payload.encode()).hexdigest()[:32]}"'
+
+
+def encode_invoice_cursor(invoice: Invoice) -> str:
+    """Encode the (created_at, id) position of an invoice into an opaque cursor"""
+    payload = json.dumps([invoice.created_at.isoformat(), invoice.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_invoice_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_invoice_cursor"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        created_at, invoice_id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return datetime.fromisoformat(created_at), int(invoice_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def invoice_filter_conditions(filters: InvoiceFilter) -> List:
+    """WHERE conditions for the requested filters, excluding access control"""
+    conditions = []
+
+    if filters.shop_id:
+        conditions.append(Invoice.shop_id == filters.shop_id)
 
     if filters.is_paid is not None:
-        query = query.where(Invoice.is_paid == filters.is_paid)
+        conditions.append(Invoice.is_paid == filters.is_paid)
 
     if filters.created_after:
-        query = query.where(Invoice.created_at >= filters.created_after)
+        conditions.append(Invoice.created_at >= filters.created_after)
 
     if filters.created_before:
-        query = query.where(Invoice.created_at <= filters.created_before)
+        conditions.append(Invoice.created_at <= filters.created_before)
 
     if filters.min_amount is not None:
-        query = query.where(Invoice.total_amount >= filters.min_amount)
+        conditions.append(Invoice.total_amount >= filters.min_amount)
 
     if filters.max_amount is not None:
-        query = query.where(Invoice.total_amount <= filters.max_amount)
+        conditions.append(Invoice.total_amount <= filters.max_amount)
 
-    query = query.order_by(Invoice.created_at.desc())
+    return conditions
 
-    query = query.offset(skip).limit(limit)
+
+def apply_invoice_filters(query, filters: InvoiceFilter, accessible_shops: FrozenSet[int]):
+    """Restrict an invoice query to the user's shops and the requested filters"""
+    query = query.where(Invoice.shop_id.in_(sorted(accessible_shops)))
+
+    if filters.shop_id and filters.shop_id not in accessible_shops:
+        raise HTTPException(status_code=403, detail="No access to this shop")
+
+    return query.where(*invoice_filter_conditions(filters))
+
+
+def paginate_invoice_query(query, skip: int, limit: int, after: Optional[str]):
+    """Order invoices newest first and apply offset or keyset pagination"""
+    query = query.order_by(Invoice.created_at.desc(), Invoice.id.desc())
+
+    if after:
+        # Keyset pagination: seek past the last seen (created_at, id) instead of
+        # scanning and discarding `skip` rows
+        after_created_at, after_id = decode_invoice_cursor(after)
+        query = query.where(
+            or_(
+                Invoice.created_at < after_created_at,
+                and_(Invoice.created_at == after_created_at, Invoice.id < after_id)
+            )
+        )
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
+@tag_queries
+async def fetch_invoices_with_filters(
+        session: AsyncSession,
+        current_user: User,
+        filters: InvoiceFilter,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None
+) -> List[Invoice]:
+    query = select(Invoice).options(
+        joinedload(Invoice.items),
+        joinedload(Invoice.shop),
+        joinedload(Invoice.user)
+    )
+
+    accessible_shops = await get_user_shop_ids(session, current_user)
+    query = apply_invoice_filters(query, filters, accessible_shops)
+    query = paginate_invoice_query(query, skip, limit, after)
 
     result = await session.execute(query)
     invoices = result.unique().scalars().all()
@@ -241,3 +688,72 @@ async def fetch_invoices_with_filters(
             invoice.formatted_date = invoice.created_at.strftime("%d-%m-%y %H:%M")
 
     return invoices
+
+
+@tag_queries
+async def fetch_invoice_summaries(
+        session: AsyncSession,
+        current_user: User,
+        filters: InvoiceFilter,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None
+) -> List[Row]:
+    """
+    Narrow projection of the invoice list: one query over the invoices table only,
+    returning Row tuples instead of ORM objects with items, shop and user attached.
+    """
+    query = select(*INVOICE_SUMMARY_COLUMNS)
+
+    accessible_shops = await get_user_shop_ids(session, current_user)
+    query = apply_invoice_filters(query, filters, accessible_shops)
+    query = paginate_invoice_query(query, skip, limit, after)
+
+    result = await session.execute(query)
+    return result.all()
+
+
+def invoice_to_dict(invoice: Invoice) -> Dict[str, Any]:
+    """
+    Convert a loaded invoice into the JSON-ready shape of InvoiceResponse,
+    reading attributes directly instead of validating them
+    """
+    shop = invoice.shop
+    return {
+        "id": invoice.id,
+        "created_at": invoice.created_at.isoformat(),
+        "contact_info": invoice.contact_info,
+        "additional_info": invoice.additional_info,
+        "total_amount": float(invoice.total_amount),
+        "is_paid": bool(invoice.is_paid),
+        "shop_id": invoice.shop_id,
+        "user_id": invoice.user_id,
+        "shop": {
+            "id": shop.id,
+            "name": shop.name,
+            "photo": shop.photo,
+            "is_active": bool(shop.is_active)
+        },
+        "items": [
+            {
+                "name": item.name,
+                "quantity": float(item.quantity),
+                "price": float(item.price),
+                "total": float(item.total),
+                "id": item.id
+            }
+            for item in invoice.items
+        ]
+    }
+
+
+def invoice_summary_to_dict(row: Row) -> Dict[str, Any]:
+    """Convert a summary Row into a JSON-ready dict"""
+    return {
+        "id": row.id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "contact_info": row.contact_info,
+        "total_amount": float(row.total_amount or 0),
+        "is_paid": bool(row.is_paid),
+        "shop_id": row.shop_id
+    }
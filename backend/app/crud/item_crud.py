@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import top_items_cache
+from app.core.query_stats import tag_queries
+from app.models.models import Invoice, InvoiceItem
+
+
+@tag_queries
+async def fetch_top_items(
+        session: AsyncSession,
+        shop_ids: FrozenSet[int],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        sort: str = "quantity",
+        limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Best-selling item names across the given shops, ranked by quantity or revenue.
+
+    One join-and-group query: invoices are narrowed by shop and date through
+    ix_invoices_shop_created_id, their items reached through ix_invoice_items_invoice_id.
+    Results are cached per parameter set for TOP_ITEMS_CACHE_TTL_SECONDS.
+    """
+    cache_key = (tuple(sorted(shop_ids)), start_date, end_date, sort, limit)
+    cached = top_items_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if not shop_ids:
+        return []
+
+    quantity = func.sum(InvoiceItem.quantity).label("quantity")
+    revenue = func.sum(InvoiceItem.total).label("revenue")
+    query = select(
+        InvoiceItem.name,
+        quantity,
+        revenue,
+        func.count(func.distinct(InvoiceItem.invoice_id)).label("invoice_count")
+    ).join(
+        Invoice, Invoice.id == InvoiceItem.invoice_id
+    ).where(
+        Invoice.shop_id.in_(sorted(shop_ids))
+    ).group_by(InvoiceItem.name)
+
+    if start_date:
+        query = query.where(Invoice.created_at >= start_date)
+    if end_date:
+        query = query.where(Invoice.created_at <= end_date)
+
+    order = revenue if sort == "revenue" else quantity
+    query = query.order_by(order.desc(), InvoiceItem.name).limit(limit)
+
+    result = await session.execute(query)
+    items = [
+        {
+            "name": row.name,
+            "quantity": round(float(row.quantity or 0), 3),
+            "revenue": round(float(row.revenue or 0), 2),
+            "invoice_count": int(row.invoice_count)
+        }
+        for row in result.all()
+    ]
+
+    top_items_cache.set(cache_key, items)
+    return items
@@ -0,0 +1,145 @@
+import asyncio
+import io
+import zipfile
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import async_session_factory
+from app.core.pdf_renderer import pdf_renderer, invoice_pdf_data
+from app.core.query_stats import tag_queries, query_crud
+from app.crud.invoice_crud import get_user_shop_ids, apply_invoice_filters
+from app.models.models import User, Invoice
+from app.schemas.schemas import InvoiceFilter
+
+# Bytes copied from a rendered file into the archive per write
+ZIP_COPY_BLOCK_SIZE = 64 * 1024
+
+
+@tag_queries
+async def fetch_batch_invoice_ids(
+        session: AsyncSession,
+        current_user: User,
+        invoice_ids: Optional[List[int]],
+        filters: Optional[InvoiceFilter],
+        max_invoices: int
+) -> List[int]:
+    """Ids of the accessible invoices selected by an id list and/or filter, newest first"""
+    if not invoice_ids and filters is None:
+        raise HTTPException(status_code=400, detail="Either ids or filter is required")
+
+    accessible_shops = await get_user_shop_ids(session, current_user)
+    query = apply_invoice_filters(select(Invoice.id), filters or InvoiceFilter(), accessible_shops)
+    if invoice_ids:
+        query = query.where(Invoice.id.in_(invoice_ids))
+    query = query.order_by(Invoice.created_at.desc(), Invoice.id.desc()).limit(max_invoices + 1)
+
+    result = await session.execute(query)
+    ids = [row[0] for row in result.all()]
+
+    if not ids:
+        raise HTTPException(status_code=404, detail="No invoices found")
+    if len(ids) > max_invoices:
+        raise HTTPException(status_code=413, detail=f"At most {max_invoices} invoices per batch")
+    return ids
+
+
+@tag_queries
+async def load_invoices_pdf_data(session: AsyncSession, invoice_ids: List[int]) -> List[dict]:
+    """PDF data of the given invoices, in the order of invoice_ids"""
+    result = await session.execute(
+        select(Invoice).options(selectinload(Invoice.items)).where(Invoice.id.in_(invoice_ids))
+    )
+    invoices = {invoice.id: invoice for invoice in result.scalars().all()}
+    return [invoice_pdf_data(invoices[invoice_id]) for invoice_id in invoice_ids if invoice_id in invoices]
+
+
+async def render_batch_pdf(session: AsyncSession, invoice_ids: List[int], window: int) -> str:
+    """
+    Path of a temporary PDF of all the invoices, each starting on a new page.
+
+    Invoices are loaded and rendered in windows, in parallel across the PDF pool
+    and through the per-invoice disk cache, so only one window of invoice data
+    is held at a time; the rendered files are then merged. The caller removes
+    the returned file.
+    """
+    paths = []
+    for start in range(0, len(invoice_ids), window):
+        paths += [path for _, path in await _render_window(session, invoice_ids[start:start + window])]
+    return await pdf_renderer.merge(paths)
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, non-seekable sink for zipfile; written bytes are collected until drained"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def _render_window(session: AsyncSession, invoice_ids: List[int]) -> List[Tuple[int, str]]:
+    invoices_data = await load_invoices_pdf_data(session, invoice_ids)
+    paths = await pdf_renderer.render_invoices(invoices_data)
+    return [(data["id"], path) for data, path in zip(invoices_data, paths)]
+
+
+async def stream_invoice_zip(invoice_ids: List[int], window: int) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP of the invoices' PDFs as it is written.
+
+    Invoices are loaded and rendered in windows, in parallel across the PDF pool,
+    and the next window renders while the current one is streamed. Only one
+    window of invoice data and one copy block are held in memory, whatever the
+    batch size. Uses its own session; the request's is closed before streaming.
+    """
+    # Generators cannot use @tag_queries; the tag lasts until the response is done
+    query_crud.set("pdf_crud.stream_invoice_zip")
+    sink = _ZipStream()
+    windows = [invoice_ids[start:start + window] for start in range(0, len(invoice_ids), window)]
+
+    async with async_session_factory() as session:
+        next_window = asyncio.ensure_future(_render_window(session, windows[0])) if windows else None
+        try:
+            with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for index in range(len(windows)):
+                    rendered = await next_window
+                    next_window = None
+                    if index + 1 < len(windows):
+                        next_window = asyncio.ensure_future(_render_window(session, windows[index + 1]))
+
+                    for invoice_id, path in rendered:
+                        with archive.open(f"invoice_{invoice_id}.pdf", mode="w") as entry, open(path, "rb") as source:
+                            while block := source.read(ZIP_COPY_BLOCK_SIZE):
+                                entry.write(block)
+                                data = sink.drain()
+                                if data:
+                                    yield data
+                        data = sink.drain()
+                        if data:
+                            yield data
+        finally:
+            if next_window is not None:
+                next_window.cancel()
+
+    # Central directory, written when the archive is closed
+    yield sink.drain()
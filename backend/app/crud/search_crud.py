@@ -0,0 +1,117 @@
+from typing import Any, Dict, FrozenSet, List
+
+from sqlalchemy import select, func, union_all
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.query_stats import tag_queries
+from app.core.search_index import invoice_search_index, tokenize
+from app.crud.invoice_crud import INVOICE_SUMMARY_COLUMNS, invoice_summary_to_dict
+from app.models.models import Invoice, InvoiceItem
+
+
+def _boolean_mode_query(tokens: List[str]) -> str:
+    """Any-term prefix query; tokens are plain \\w+ words, so no operators can slip in"""
+    return " ".join(f"{token}*" for token in tokens)
+
+
+async def _search_fulltext(
+        session: AsyncSession,
+        tokens: List[str],
+        shop_ids: FrozenSet[int],
+        skip: int,
+        limit: int
+) -> List[Dict[str, Any]]:
+    """Rank invoices by MATCH() relevance over contact_info plus their item names"""
+    against = _boolean_mode_query(tokens)
+    contact_score = match(Invoice.contact_info, against=against).in_boolean_mode()
+    item_score = match(InvoiceItem.name, against=against).in_boolean_mode()
+    shops = sorted(shop_ids)
+
+    contact_hits = select(
+        Invoice.id.label("invoice_id"),
+        contact_score.label("score")
+    ).where(contact_score, Invoice.shop_id.in_(shops))
+
+    item_hits = select(
+        InvoiceItem.invoice_id.label("invoice_id"),
+        item_score.label("score")
+    ).join(
+        Invoice, Invoice.id == InvoiceItem.invoice_id
+    ).where(item_score, Invoice.shop_id.in_(shops))
+
+    hits = union_all(contact_hits, item_hits).subquery()
+    ranked = select(
+        hits.c.invoice_id,
+        func.sum(hits.c.score).label("score")
+    ).group_by(hits.c.invoice_id).subquery()
+
+    query = select(*INVOICE_SUMMARY_COLUMNS, ranked.c.score).join(
+        ranked, ranked.c.invoice_id == Invoice.id
+    ).order_by(ranked.c.score.desc(), Invoice.id.desc()).offset(skip).limit(limit)
+
+    result = await session.execute(query)
+    return [
+        {**invoice_summary_to_dict(row), "score": round(float(row.score), 4)}
+        for row in result.all()
+    ]
+
+
+async def _rebuild_search_index(session: AsyncSession) -> None:
+    contacts = await session.execute(
+        select(Invoice.id, Invoice.shop_id, Invoice.contact_info)
+    )
+    items = await session.execute(
+        select(InvoiceItem.invoice_id, Invoice.shop_id, InvoiceItem.name).join(
+            Invoice, Invoice.id == InvoiceItem.invoice_id
+        )
+    )
+    invoice_search_index.build(list(contacts.all()) + list(items.all()))
+
+
+async def _search_inverted_index(
+        session: AsyncSession,
+        q: str,
+        shop_ids: FrozenSet[int],
+        skip: int,
+        limit: int
+) -> List[Dict[str, Any]]:
+    """Rank invoices with the in-memory inverted index, then load the page's summaries"""
+    if invoice_search_index.stale:
+        await _rebuild_search_index(session)
+
+    page = invoice_search_index.search(q, shop_ids)[skip:skip + limit]
+    if not page:
+        return []
+
+    result = await session.execute(
+        select(*INVOICE_SUMMARY_COLUMNS).where(Invoice.id.in_([invoice_id for invoice_id, _ in page]))
+    )
+    rows = {row.id: row for row in result.all()}
+    return [
+        {**invoice_summary_to_dict(rows[invoice_id]), "score": round(score, 4)}
+        for invoice_id, score in page
+        if invoice_id in rows
+    ]
+
+
+@tag_queries
+async def search_invoices(
+        session: AsyncSession,
+        q: str,
+        shop_ids: FrozenSet[int],
+        skip: int = 0,
+        limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Invoice summaries whose contact_info or item names match the query, best
+    match first. Uses the FULLTEXT indexes on MySQL and the in-memory inverted
+    index on other databases.
+    """
+    tokens = tokenize(q)
+    if not tokens or not shop_ids:
+        return []
+
+    if session.bind.dialect.name == "mysql":
+        return await _search_fulltext(session, tokens, shop_ids, skip, limit)
+    return await _search_inverted_index(session, q, shop_ids, skip, limit)
@@ -0,0 +1,289 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import select, func, case, and_, or_, delete, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.query_stats import tag_queries
+from app.models.models import Invoice, InvoiceDailyStats
+
+# (shop_id, day) -> [invoice_count, total_amount, paid_count, paid_amount]
+StatsDeltas = Dict[Tuple[int, date], List[float]]
+
+
+def add_invoice_stats_delta(
+        deltas: StatsDeltas,
+        shop_id: int,
+        created_at: datetime,
+        total_amount: float,
+        is_paid: bool,
+        sign: int = 1
+) -> None:
+    """Add (sign=1) or remove (sign=-1) one invoice's contribution to its day"""
+    delta = deltas.setdefault((shop_id, created_at.date()), [0, 0.0, 0, 0.0])
+    amount = float(total_amount or 0) * sign
+    delta[0] += sign
+    delta[1] += amount
+    if is_paid:
+        delta[2] += sign
+        delta[3] += amount
+
+
+@tag_queries
+async def apply_invoice_stats_deltas(session: AsyncSession, deltas: StatsDeltas) -> None:
+    """Fold the deltas into invoice_daily_stats with one upsert, inside the caller's transaction"""
+    rows = [
+        {
+            "shop_id": shop_id,
+            "day": day,
+            "invoice_count": int(delta[0]),
+            "total_amount": round(delta[1], 2),
+            "paid_count": int(delta[2]),
+            "paid_amount": round(delta[3], 2)
+        }
+        for (shop_id, day), delta in deltas.items()
+    ]
+    rows = [
+        row for row in rows
+        if row["invoice_count"] or row["total_amount"] or row["paid_count"] or row["paid_amount"]
+    ]
+    if not rows:
+        return
+
+    table = InvoiceDailyStats.__table__
+    if session.bind.dialect.name == "mysql":
+        stmt = mysql_insert(table)
+        incoming = stmt.inserted
+        stmt = stmt.on_duplicate_key_update(**_summed_stats_columns(table, incoming))
+    else:
+        # SQLite, the other database the app runs on
+        stmt = sqlite_insert(table)
+        incoming = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.shop_id, table.c.day],
+            set_=_summed_stats_columns(table, incoming)
+        )
+    await session.execute(stmt, rows)
+
+
+def _summed_stats_columns(table, incoming) -> Dict[str, Any]:
+    """Upsert assignments adding the incoming row's counters to the stored ones"""
+    return {
+        name: table.c[name] + incoming[name]
+        for name in ("invoice_count", "total_amount", "paid_count", "paid_amount")
+    }
+
+
+def daily_stats_rebuild_statements(shop_id: Optional[int] = None) -> list:
+    """Statements that recompute invoice_daily_stats from raw invoices"""
+    day = func.date(Invoice.created_at)
+    source = select(
+        Invoice.shop_id,
+        day,
+        func.count(Invoice.id),
+        func.coalesce(func.sum(Invoice.total_amount), 0),
+        func.coalesce(func.sum(case((Invoice.is_paid, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Invoice.is_paid, Invoice.total_amount), else_=0)), 0)
+    ).group_by(Invoice.shop_id, day)
+    clear = delete(InvoiceDailyStats)
+
+    if shop_id is not None:
+        source = source.where(Invoice.shop_id == shop_id)
+        clear = clear.where(InvoiceDailyStats.shop_id == shop_id)
+
+    fill = insert(InvoiceDailyStats).from_select(
+        ["shop_id", "day", "invoice_count", "total_amount", "paid_count", "paid_amount"],
+        source
+    )
+    return [clear, fill]
+
+
+@tag_queries
+async def rebuild_daily_stats(session: AsyncSession, shop_id: Optional[int] = None) -> None:
+    """Recompute the rollup (for one shop or all of them) and commit"""
+    for statement in daily_stats_rebuild_statements(shop_id):
+        await session.execute(statement)
+    await session.commit()
+
+
+def split_stats_range(
+        start: Optional[datetime],
+        end: Optional[datetime]
+) -> Tuple[Optional[Tuple[Optional[date], Optional[date]]], List[list]]:
+    """
+    Split the inclusive range [start, end] into whole days, answered by the
+    rollup, and partial edge days, which have to be read from raw invoices.
+
+    Returns ``(whole_days, edge_conditions)``: whole days satisfy
+    ``first_day <= day < end_day`` (a None bound is open), or whole_days is None
+    when the range covers no whole day. Each edge is a list of conditions on
+    Invoice.created_at.
+    """
+    first_midnight = None
+    if start is not None:
+        first_midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        if first_midnight != start:
+            first_midnight += timedelta(days=1)
+
+    # Whole days end before the day containing `end`, which is read raw up to `end`
+    end_midnight = None
+    if end is not None:
+        end_midnight = end.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if first_midnight is not None and end_midnight is not None and first_midnight >= end_midnight:
+        return None, [[Invoice.created_at >= start, Invoice.created_at <= end]]
+
+    edges = []
+    if start is not None and first_midnight != start:
+        edges.append([Invoice.created_at >= start, Invoice.created_at < first_midnight])
+    if end is not None:
+        edges.append([Invoice.created_at >= end_midnight, Invoice.created_at <= end])
+
+    whole_days = (
+        first_midnight.date() if first_midnight is not None else None,
+        end_midnight.date() if end_midnight is not None else None
+    )
+    return whole_days, edges
+
+
+@tag_queries
+async def fetch_invoice_stats(
+        session: AsyncSession,
+        shop_id: Optional[int],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+) -> Dict[str, Any]:
+    """
+    Invoice count, total and paid count for a shop and date range: whole days
+    come from invoice_daily_stats, only partial edge days touch raw invoices.
+    """
+    whole_days, edges = split_stats_range(start_date, end_date)
+    total_invoices, total_amount, paid_invoices = 0, 0.0, 0
+
+    if whole_days is not None:
+        first_day, end_day = whole_days
+        query = select(
+            func.coalesce(func.sum(InvoiceDailyStats.invoice_count), 0),
+            func.coalesce(func.sum(InvoiceDailyStats.total_amount), 0),
+            func.coalesce(func.sum(InvoiceDailyStats.paid_count), 0)
+        )
+        if shop_id:
+            query = query.where(InvoiceDailyStats.shop_id == shop_id)
+        if first_day is not None:
+            query = query.where(InvoiceDailyStats.day >= first_day)
+        if end_day is not None:
+            query = query.where(InvoiceDailyStats.day < end_day)
+
+        count, amount, paid = (await session.execute(query)).one()
+        total_invoices += int(count)
+        total_amount += float(amount)
+        paid_invoices += int(paid)
+
+    if edges:
+        query = select(
+            func.count(Invoice.id),
+            func.coalesce(func.sum(Invoice.total_amount), 0),
+            func.coalesce(func.sum(case((Invoice.is_paid, 1), else_=0)), 0)
+        ).where(or_(*[and_(*conditions) for conditions in edges]))
+        if shop_id:
+            query = query.where(Invoice.shop_id == shop_id)
+
+        count, amount, paid = (await session.execute(query)).one()
+        total_invoices += int(count)
+        total_amount += float(amount)
+        paid_invoices += int(paid)
+
+    return {
+        "total_invoices": total_invoices,
+        "total_amount": round(total_amount, 2),
+        "paid_invoices": paid_invoices
+    }
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    """First day of the day/week/month bucket containing day; weeks start on Monday"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+@tag_queries
+async def fetch_invoice_series(
+        session: AsyncSession,
+        shop_ids: FrozenSet[int],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        bucket: str = "day"
+) -> List[Dict[str, Any]]:
+    """
+    Invoice count, revenue and paid/unpaid split per day, week or month, over the given shops.
+
+    Whole days are grouped from invoice_daily_stats and the partial edge days
+    from raw invoices, each with a single GROUP BY per day; the days are folded
+    into week and month buckets here, so the SQL is the same on MySQL and SQLite.
+    """
+    if not shop_ids:
+        return []
+
+    whole_days, edges = split_stats_range(start_date, end_date)
+    buckets: Dict[date, List[float]] = {}
+
+    def add(rows) -> None:
+        for day, count, amount, paid, paid_amount in rows:
+            if isinstance(day, str):
+                # DATE() on SQLite returns text
+                day = date.fromisoformat(day)
+            elif isinstance(day, datetime):
+                day = day.date()
+            totals = buckets.setdefault(_bucket_start(day, bucket), [0, 0.0, 0, 0.0])
+            totals[0] += int(count)
+            totals[1] += float(amount or 0)
+            totals[2] += int(paid or 0)
+            totals[3] += float(paid_amount or 0)
+
+    if whole_days is not None:
+        first_day, end_day = whole_days
+        query = select(
+            InvoiceDailyStats.day,
+            func.sum(InvoiceDailyStats.invoice_count),
+            func.sum(InvoiceDailyStats.total_amount),
+            func.sum(InvoiceDailyStats.paid_count),
+            func.sum(InvoiceDailyStats.paid_amount)
+        ).where(InvoiceDailyStats.shop_id.in_(sorted(shop_ids))).group_by(InvoiceDailyStats.day)
+        if first_day is not None:
+            query = query.where(InvoiceDailyStats.day >= first_day)
+        if end_day is not None:
+            query = query.where(InvoiceDailyStats.day < end_day)
+        add((await session.execute(query)).all())
+
+    if edges:
+        day_column = func.date(Invoice.created_at).label("day")
+        query = select(
+            day_column,
+            func.count(Invoice.id),
+            func.sum(Invoice.total_amount),
+            func.sum(case((Invoice.is_paid, 1), else_=0)),
+            func.sum(case((Invoice.is_paid, Invoice.total_amount), else_=0))
+        ).where(
+            or_(*[and_(*conditions) for conditions in edges]),
+            Invoice.shop_id.in_(sorted(shop_ids))
+        ).group_by(day_column)
+        add((await session.execute(query)).all())
+
+    return [
+        {
+            "bucket": bucket_day.isoformat(),
+            "total_invoices": count,
+            "total_amount": round(amount, 2),
+            "paid_invoices": paid,
+            "paid_amount": round(paid_amount, 2),
+            "unpaid_invoices": count - paid,
+            "unpaid_amount": round(amount - paid_amount, 2)
+        }
+        for bucket_day, (count, amount, paid, paid_amount) in sorted(buckets.items())
+        if count
+    ]
@@ -7,8 +7,11 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
-from app.core.config import get_db
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from app.core.cache import user_cache, shop_membership_cache
+from app.core.config import get_db, settings
+from app.core.password_hashing import PasswordHasher, PasswordHashOverloaded
+from app.core.query_stats import tag_queries
 from app.models.models import User, Invoice
 from ..schemas.schemas import TokenData
 from fastapi import APIRouter, Depends
@@ -24,19 +27,74 @@ ALGORITHM: str = os.environ["ALGORITHM"]
 ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"])  # Convert to int
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(pwd_context, settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
+# User columns kept in the in-process user cache
+USER_CACHE_FIELDS = (
+    "id", "login", "password", "email", "phone", "is_active", "is_superuser", "created_at", "auth_version"
+)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
 
+def _password_hashing_overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password operations in progress, try again later",
+        headers={"Retry-After": "1"}
+    )
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash on the password hashing pool"""
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHashOverloaded:
+        raise _password_hashing_overloaded()
+
+
+async def get_password_hash(password: str) -> str:
+    """Generate password hash on the password hashing pool"""
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHashOverloaded:
+        raise _password_hashing_overloaded()
+
+
+@tag_queries
+async def get_user_by_id(session: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    Load a user, serving the row from the in-process user cache when possible.
+
+    Cached rows are served without touching the users table. Changes made in
+    this process invalidate the entry directly; edits made by other workers or
+    the admin panel (which bump auth_version) are seen once the entry's
+    USER_CACHE_TTL_SECONDS run out.
+    """
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        # Rebuild the row as a persistent instance without reloading it,
+        # so changes made by the request (e.g. a new password) still get flushed
+        user = User(**cached)
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+    query = select(User).where(User.id == user_id)
+    result = await session.execute(query)
+    user = result.scalar_one_or_none()
+
+    if user is not None:
+        user_cache.set(user_id, {field: getattr(user, field) for field in USER_CACHE_FIELDS})
+    return user
 
-def get_password_hash(password: str) -> str:
-    """Generate password hash"""
-    return pwd_context.hash(password)
 
+def invalidate_cached_user(user_id: int) -> None:
+    """Drop a user and their memberships from this process's caches"""
+    user_cache.invalidate(user_id)
+    shop_membership_cache.invalidate(user_id)
 
+
+@tag_queries
 async def get_user_shop_data(session: AsyncSession, user: User) -> Dict[str, Any]:
     """Get user's shop ID and last invoice information"""
     # Загружаем пользователя со связанными магазинами одним запросом
@@ -130,9 +188,7 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    query = select(User).where(User.id == token_data.user_id)
-    result = await session.execute(query)
-    user = result.scalar_one_or_none()
+    user = await get_user_by_id(session, token_data.user_id)
 
     if user is None:
         raise credentials_exception
@@ -6,6 +6,7 @@ from sqlalchemy import text
 # Import your models and database configuration
 from app.models.models import Base, User, Shop, Invoice, InvoiceItem
 from app.core.config import engine, init_db
+from app.db.migrations import run_migrations, schema_migrations
 
 
 async def drop_all_tables_async(engine_instance: Optional[AsyncEngine] = None) -> None:
@@ -19,6 +20,7 @@ async def drop_all_tables_async(engine_instance: Optional[AsyncEngine] = None) -
 
             # Drop all tables
             await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(schema_migrations.drop, checkfirst=True)
 
             # Re-enable foreign key checks
             await conn.execute(text("SET FOREIGN_KEY_CHECKS = 1;"))
@@ -30,13 +32,12 @@ async def drop_all_tables_async(engine_instance: Optional[AsyncEngine] = None) -
 
 
 async def create_tables_async(engine_instance: Optional[AsyncEngine] = None) -> None:
-    """Create all tables defined in the models"""
+    """Create all tables by applying every schema migration"""
     current_engine = engine_instance or engine
 
     try:
-        async with current_engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("All tables successfully created")
+        applied = await run_migrations(current_engine)
+        print(f"All tables successfully created (migrations {applied})")
     except Exception as e:
         print(f"Error creating tables: {str(e)}")
         raise
@@ -45,7 +46,7 @@ async def create_tables_async(engine_instance: Optional[AsyncEngine] = None) ->
 async def verify_tables_async(engine_instance: Optional[AsyncEngine] = None) -> None:
     """Verify that all required tables were created correctly"""
     current_engine = engine_instance or engine
-    expected_tables = {'users', 'shops', 'users_shops', 'invoices', 'invoice_items'}
+    expected_tables = {'users', 'shops', 'users_shops', 'invoices', 'invoice_items', 'schema_migrations'}
 
     try:
         async with current_engine.connect() as conn:
@@ -0,0 +1,267 @@
+"""
+Versioned schema migrations.
+
+Every migration has a version number and an idempotent upgrade function that
+receives a synchronous connection. Applied versions are recorded in the
+``schema_migrations`` table, so running the upgrade twice is a no-op.
+
+Usage:
+    python -m app.db.migrations upgrade      # apply pending migrations
+    python -m app.db.migrations status       # list applied / pending migrations
+    python -m app.db.migrations check-plans  # fail if hot queries stop using their indexes
+"""
+import asyncio
+import sys
+from datetime import datetime
+from typing import Callable, List, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, func, inspect, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.crud.stats_crud import daily_stats_rebuild_statements
+from app.models.models import Base, Invoice, InvoiceItem
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, server_default=func.now())
+)
+
+
+class Migration:
+    """Single schema migration step"""
+
+    def __init__(self, version: int, description: str, upgrade: Callable[[Connection], None]):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+
+def _create_missing_tables(conn: Connection, table_names: List[str]) -> None:
+    """Create the given model tables (with their indexes) unless they already exist"""
+    tables = [Base.metadata.tables[name] for name in table_names]
+    Base.metadata.create_all(conn, tables=tables, checkfirst=True)
+
+
+def _create_missing_indexes(conn: Connection, table_name: str, index_names: List[str]) -> None:
+    """Create indexes declared on a model table that are not present in the database"""
+    table = Base.metadata.tables[table_name]
+    existing = {index["name"] for index in inspect(conn).get_indexes(table_name)}
+    for index in table.indexes:
+        if index.name in index_names and index.name not in existing:
+            index.create(conn)
+
+
+def _add_missing_columns(conn: Connection, table_name: str, column_names: List[str]) -> None:
+    """Add columns declared on a model table that are not present in the database"""
+    table = Base.metadata.tables[table_name]
+    existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    for name in column_names:
+        if name not in existing:
+            column_ddl = CreateColumn(table.c[name]).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+
+
+def _initial_schema(conn: Connection) -> None:
+    _create_missing_tables(conn, ["users", "shops", "users_shops", "invoices", "invoice_items"])
+
+
+def _invoice_hot_query_indexes(conn: Connection) -> None:
+    _create_missing_indexes(conn, "invoices", [
+        "ix_invoices_shop_created_id",
+        "ix_invoices_shop_paid_created",
+        "ix_invoices_user_shop_created",
+    ])
+    _create_missing_indexes(conn, "invoice_items", ["ix_invoice_items_invoice_id"])
+
+
+def _invoice_daily_stats(conn: Connection) -> None:
+    _create_missing_tables(conn, ["invoice_daily_stats"])
+    # Backfill from existing invoices
+    for statement in daily_stats_rebuild_statements():
+        conn.execute(statement)
+
+
+def _invoice_search_indexes(conn: Connection) -> None:
+    _create_missing_indexes(conn, "invoices", ["ix_invoices_contact_info_ft"])
+    _create_missing_indexes(conn, "invoice_items", ["ix_invoice_items_name_ft"])
+
+
+def _version_columns(conn: Connection) -> None:
+    _add_missing_columns(conn, "invoices", ["version"])
+    _add_missing_columns(conn, "shops", ["list_version"])
+
+
+def _user_auth_version(conn: Connection) -> None:
+    _add_missing_columns(conn, "users", ["auth_version"])
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Initial schema", _initial_schema),
+    Migration(2, "Composite indexes for invoice hot queries", _invoice_hot_query_indexes),
+    Migration(3, "Daily invoice stats rollup", _invoice_daily_stats),
+    Migration(4, "FULLTEXT indexes for invoice search", _invoice_search_indexes),
+    Migration(5, "Invoice and shop list versions for ETags", _version_columns),
+    Migration(6, "User auth version for cross-process cache invalidation", _user_auth_version),
+]
+
+
+def _applied_versions(conn: Connection) -> Set[int]:
+    schema_migrations.create(conn, checkfirst=True)
+    return {row[0] for row in conn.execute(select(schema_migrations.c.version))}
+
+
+def _upgrade(conn: Connection) -> List[int]:
+    applied = _applied_versions(conn)
+    newly_applied = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        print(f"Applying migration {migration.version}: {migration.description}")
+        migration.upgrade(conn)
+        conn.execute(schema_migrations.insert().values(
+            version=migration.version,
+            description=migration.description
+        ))
+        newly_applied.append(migration.version)
+    return newly_applied
+
+
+async def run_migrations(engine: AsyncEngine) -> List[int]:
+    """Apply all pending migrations and return the versions that were applied"""
+    async with engine.begin() as conn:
+        is_mysql = conn.dialect.name == "mysql"
+        if is_mysql:
+            # Several workers may start at once; only one of them should migrate
+            acquired = (await conn.execute(text("SELECT GET_LOCK('schema_migrations', 60)"))).scalar()
+            if acquired != 1:
+                # 0 on timeout, NULL on error; migrating now would race the lock holder
+                raise RuntimeError("Could not acquire the schema_migrations lock within 60 seconds")
+        try:
+            return await conn.run_sync(_upgrade)
+        finally:
+            if is_mysql:
+                await conn.execute(text("SELECT RELEASE_LOCK('schema_migrations')"))
+
+
+async def migration_status(engine: AsyncEngine) -> None:
+    """Print applied and pending migrations"""
+    async with engine.connect() as conn:
+        applied = await conn.run_sync(_applied_versions)
+    for migration in MIGRATIONS:
+        state = "applied" if migration.version in applied else "pending"
+        print(f"{migration.version:>4}  {state:<8} {migration.description}")
+
+
+# Hot queries together with the indexes their plans are expected to use.
+# The statements mirror the shapes issued by the invoice CRUD and routers.
+HOT_QUERIES = [
+    (
+        "invoice list by shop",
+        select(Invoice.id).where(Invoice.shop_id == 1)
+        .order_by(Invoice.created_at.desc(), Invoice.id.desc()).limit(100),
+        {"ix_invoices_shop_created_id"}
+    ),
+    (
+        "invoice stats by shop and date range",
+        select(func.count(Invoice.id), func.sum(Invoice.total_amount)).where(
+            Invoice.shop_id == 1,
+            Invoice.created_at >= datetime(2024, 1, 1),
+            Invoice.created_at <= datetime(2024, 12, 31)
+        ),
+        {"ix_invoices_shop_created_id", "ix_invoices_shop_paid_created"}
+    ),
+    (
+        "unpaid invoices by shop and date range",
+        select(Invoice.id).where(
+            Invoice.shop_id == 1,
+            Invoice.is_paid.is_(False),
+            Invoice.created_at >= datetime(2024, 1, 1)
+        ),
+        {"ix_invoices_shop_paid_created"}
+    ),
+    (
+        "last invoice of user in shop",
+        select(Invoice.id).where(Invoice.user_id == 1, Invoice.shop_id == 1)
+        .order_by(Invoice.created_at.desc()).limit(1),
+        {"ix_invoices_user_shop_created"}
+    ),
+    (
+        "top items by shop and date range",
+        select(InvoiceItem.name, func.sum(InvoiceItem.quantity))
+        .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+        .where(Invoice.shop_id.in_([1]), Invoice.created_at >= datetime(2024, 1, 1))
+        .group_by(InvoiceItem.name),
+        {"ix_invoices_shop_created_id", "ix_invoices_shop_paid_created", "ix_invoice_items_invoice_id"}
+    ),
+    (
+        "invoice search by contact",
+        select(Invoice.id).where(match(Invoice.contact_info, against="ivanov*").in_boolean_mode()),
+        {"ix_invoices_contact_info_ft"}
+    ),
+    (
+        "invoice search by item name",
+        select(InvoiceItem.invoice_id).where(match(InvoiceItem.name, against="milk*").in_boolean_mode()),
+        {"ix_invoice_items_name_ft"}
+    ),
+    (
+        "items of invoice",
+        select(InvoiceItem.id).where(InvoiceItem.invoice_id == 1),
+        {"ix_invoice_items_invoice_id"}
+    ),
+]
+
+
+def _check_plans(conn: Connection) -> List[str]:
+    failures = []
+    for name, statement, expected_indexes in HOT_QUERIES:
+        compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+        params = tuple(compiled.params[key] for key in compiled.positiontup)
+        plan = conn.exec_driver_sql(f"EXPLAIN {compiled}", params).mappings().all()
+        used = {row["key"] for row in plan if row["key"]}
+        if not used & expected_indexes:
+            failures.append(
+                f"{name}: expected one of {sorted(expected_indexes)}, plan uses {sorted(used) or 'no index'}"
+            )
+    return failures
+
+
+async def check_hot_query_plans(engine: AsyncEngine) -> List[str]:
+    """EXPLAIN every hot query and return a description of each one that no longer uses its index"""
+    async with engine.connect() as conn:
+        if conn.dialect.name != "mysql":
+            raise RuntimeError("Query plan check is only supported on MySQL")
+        return await conn.run_sync(_check_plans)
+
+
+async def _main(command: str) -> int:
+    from app.core.config import engine
+
+    try:
+        if command == "upgrade":
+            applied = await run_migrations(engine)
+            print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+        elif command == "status":
+            await migration_status(engine)
+        elif command == "check-plans":
+            failures = await check_hot_query_plans(engine)
+            for failure in failures:
+                print(f"FAIL {failure}")
+            if failures:
+                return 1
+            print("All hot queries use their indexes")
+        else:
+            print(__doc__)
+            return 2
+        return 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "upgrade")))
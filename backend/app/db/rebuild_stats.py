@@ -0,0 +1,33 @@
+"""
+Rebuild the invoice_daily_stats rollup from raw invoices.
+
+The rollup is maintained incrementally by the invoice CRUD; use this to
+backfill it or to repair drift. Run it during low traffic.
+
+Usage:
+    python -m app.db.rebuild_stats            # all shops
+    python -m app.db.rebuild_stats <shop_id>  # a single shop
+"""
+import asyncio
+import sys
+from typing import Optional
+
+from app.core.config import async_session_factory, engine
+from app.crud.stats_crud import rebuild_daily_stats
+
+
+async def rebuild(shop_id: Optional[int] = None) -> None:
+    try:
+        async with async_session_factory() as session:
+            await rebuild_daily_stats(session, shop_id)
+        print(f"Daily stats rebuilt for {'shop ' + str(shop_id) if shop_id else 'all shops'}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(rebuild(int(sys.argv[1]) if len(sys.argv) > 1 else None))
+    except Exception as e:
+        print(f"Error rebuilding daily stats: {str(e)}")
+        exit(1)
@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Table, Numeric, MetaData
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Date, DateTime, Text, Table, Numeric, MetaData, \
+    Index
 from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 
@@ -34,6 +35,9 @@ class User(Base):
         DateTime(timezone=True),
         server_default=func.now()
     )
+    # Bumped on every change to the user's credentials or shop memberships, including
+    # admin panel edits; cached copies of the user and memberships are checked against it
+    auth_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     shops: Mapped[List["Shop"]] = relationship(
@@ -62,6 +66,8 @@ class Shop(Base):
     )
     additional_info: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Bumped on every write to the shop's invoices; part of the invoice list ETag
+    list_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     users: Mapped[List["User"]] = relationship(
@@ -80,6 +86,16 @@ class Shop(Base):
 class Invoice(Base):
     """Invoice model representing sales documents"""
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Listing and keyset pagination: WHERE shop_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_invoices_shop_created_id", "shop_id", "created_at", "id"),
+        # Stats and paid/unpaid filtering over a date range
+        Index("ix_invoices_shop_paid_created", "shop_id", "is_paid", "created_at"),
+        # Last invoice of a user in a shop
+        Index("ix_invoices_user_shop_created", "user_id", "shop_id", "created_at"),
+        # Invoice search by contact
+        Index("ix_invoices_contact_info_ft", "contact_info", mysql_prefix="FULLTEXT"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -94,6 +110,8 @@ class Invoice(Base):
         default=0
     )
     is_paid: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Bumped on every update of the invoice or its items; source of the invoice ETag
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
 
     # Foreign Keys
     shop_id: Mapped[int] = mapped_column(
@@ -120,6 +138,11 @@ class Invoice(Base):
 class InvoiceItem(Base):
     """Model representing individual items within an invoice"""
     __tablename__ = "invoice_items"
+    __table_args__ = (
+        Index("ix_invoice_items_invoice_id", "invoice_id"),
+        # Invoice search by item name
+        Index("ix_invoice_items_name_ft", "name", mysql_prefix="FULLTEXT"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -147,4 +170,20 @@ class InvoiceItem(Base):
     )
 
     # Relationship
-    invoice: Mapped["Invoice"] = relationship("Invoice", back_populates="items")
\ No newline at end of file
+    invoice: Mapped["Invoice"] = relationship("Invoice", back_populates="items")
+
+
+class InvoiceDailyStats(Base):
+    """Per-shop daily invoice totals, maintained incrementally by the invoice CRUD"""
+    __tablename__ = "invoice_daily_stats"
+
+    shop_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("shops.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    invoice_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_amount: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    paid_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    paid_amount: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from pydantic import BaseModel, EmailStr, ConfigDict
 
 
@@ -103,6 +103,25 @@ class InvoiceCreate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class InvoiceBulkCreate(BaseModel):
+    invoices: List[InvoiceCreate]
+    # atomic: nothing is created if any invoice is rejected; best_effort: rejected ones are skipped
+    mode: Literal["atomic", "best_effort"] = "atomic"
+
+
+class InvoiceBulkResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "rejected"]
+    error: Optional[str] = None
+
+
+class InvoiceBulkResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[InvoiceBulkResult]
+
+
 class InvoiceFilter(BaseModelConfig):
     shop_id: Optional[int] = None
     is_paid: Optional[bool] = None
@@ -112,6 +131,23 @@ class InvoiceFilter(BaseModelConfig):
     max_amount: Optional[float] = None
 
 
+class InvoiceBulkStatusUpdate(BaseModel):
+    is_paid: bool
+    ids: Optional[List[int]] = None
+    filter: Optional[InvoiceFilter] = None
+
+
+class InvoiceBulkStatusResponse(BaseModel):
+    is_paid: bool
+    updated_ids: List[int]
+
+
+class InvoicePdfBatch(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[InvoiceFilter] = None
+    format: Literal["zip", "pdf"] = "zip"
+
+
 class InvoiceResponse(BaseModel):
     id: int
     created_at: datetime
@@ -122,12 +158,13 @@ class InvoiceResponse(BaseModel):
     shop_id: int
     user_id: int
     shop: ShopBase
-    items: List[InvoiceItemBase] = []
+    items: List[InvoiceItemResponse] = []
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class InvoiceItemUpdate(BaseModel):
+    id: Optional[int] = None  # Stored item to update; items without id are matched by content
     name: str
     quantity: float
     price: float
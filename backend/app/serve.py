@@ -0,0 +1,126 @@
+"""
+Production entry point: a gunicorn master supervising uvicorn workers.
+
+    python -m app.serve [--bind 0.0.0.0:8000] [--workers N] [--max-connections N]
+
+run.py's __main__ stays the development server (reload, debug logging, one worker).
+
+- Workers default to the number of CPU cores (WEB_WORKERS overrides it).
+- The app is imported once in the master (preload_app) and forked, so workers
+  start without re-importing it. The engine created at import time is disposed
+  in each worker right after the fork, so no connection is shared between
+  processes.
+- Each worker's pool is sized so that all workers together stay within
+  DB_MAX_CONNECTIONS minus DB_RESERVED_CONNECTIONS, which are left for
+  migrations, admin sessions and other clients.
+- kill -HUP <master pid> replaces the workers one generation at a time: new
+  workers start before the old ones finish their in-flight requests (up to
+  --graceful-timeout). Preloaded code is not re-imported on HUP; to deploy new
+  code send USR2 (starts a new master) and then QUIT to the old master.
+- --max-requests recycles each worker after that many requests, with jitter so
+  workers do not restart together.
+- RESPONSE_CACHE_BACKEND=memory stays correct with several workers, since
+  entries are keyed on the database list versions, but each worker holds and
+  fills its own copy; redis shares one. The user and shop membership caches are
+  per worker too, and see edits made elsewhere within USER_CACHE_TTL_SECONDS.
+- /metrics is answered by whichever worker accepts the connection and reports
+  only that worker's counters, histograms and pool. Scraping it through the
+  bind address samples a different worker each time, so dashboards should use
+  it per worker (one worker) or rates that tolerate the mix; an aggregated
+  multi-worker view is not provided.
+"""
+import argparse
+import os
+from typing import Tuple
+
+from gunicorn.app.base import BaseApplication
+from pydantic_settings import BaseSettings
+
+
+class ServeSettings(BaseSettings):
+    """The launcher's settings, read before app.core.config creates the engine"""
+    WEB_WORKERS: int = 0
+    DB_MAX_CONNECTIONS: int = 151
+    DB_RESERVED_CONNECTIONS: int = 10
+    RESPONSE_CACHE_BACKEND: str = "memory"
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+def per_worker_pool(max_connections: int, reserved: int, workers: int) -> Tuple[int, int]:
+    """pool_size and max_overflow of one worker, two thirds of its share kept open"""
+    per_worker = (max_connections - reserved) // workers
+    if per_worker < 1:
+        raise ValueError(f"{max_connections - reserved} database connections cannot serve {workers} workers")
+    pool_size = max(1, per_worker * 2 // 3)
+    return pool_size, per_worker - pool_size
+
+
+def post_fork(server, worker) -> None:
+    from app.core.config import engine
+
+    # Forget connections inherited from the master without closing them under it
+    engine.sync_engine.dispose(close=False)
+
+
+class InvoiceServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from run import app
+
+        return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Invoice API with gunicorn and uvicorn workers")
+    parser.add_argument("--bind", default="0.0.0.0:8000")
+    parser.add_argument("--workers", type=int, default=0, help="default: WEB_WORKERS or the number of cores")
+    parser.add_argument("--max-connections", type=int, default=0, help="default: DB_MAX_CONNECTIONS")
+    parser.add_argument("--timeout", type=int, default=60, help="seconds before a silent worker is restarted")
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument("--max-requests", type=int, default=0, help="recycle workers after this many requests")
+    args = parser.parse_args()
+
+    serve_settings = ServeSettings()
+    workers = args.workers or serve_settings.WEB_WORKERS or os.cpu_count() or 1
+    max_connections = args.max_connections or serve_settings.DB_MAX_CONNECTIONS
+    pool_size, max_overflow = per_worker_pool(max_connections, serve_settings.DB_RESERVED_CONNECTIONS, workers)
+
+    # Read by app.core.config when the master preloads the app
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+    print(
+        f"Starting {workers} workers on {args.bind}; database pool {pool_size} + {max_overflow} overflow "
+        f"per worker, {workers * (pool_size + max_overflow)} of {max_connections} connections"
+    )
+    if workers > 1 and serve_settings.RESPONSE_CACHE_BACKEND == "memory":
+        print(f"Warning: with RESPONSE_CACHE_BACKEND=memory each of the {workers} workers holds its own "
+              "copy of the response cache; set RESPONSE_CACHE_BACKEND=redis to share one")
+
+    InvoiceServer({
+        "bind": args.bind,
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "keepalive": 5,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests // 10,
+        "post_fork": post_fork,
+        "loglevel": "info",
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Invoice read latency during a burst of logins.
+
+Samples GET latency of an invoice endpoint while idle, then again while
+--logins concurrent logins run bcrypt verification on the server. With password
+hashing off the event loop the two distributions should match. Exits with
+status 1 when the p95 during the burst exceeds --max-ratio times the idle p95
+plus --slack-ms.
+
+Needs a running server and an existing user:
+    python -m benchmarks.login_burst_load_test --login alice --password secret \\
+        [--base-url http://127.0.0.1:8000] [--logins 200] [--path /api/v1/invoices/?limit=20]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import List
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> httpx.Response:
+    return await client.post("/api/v1/auth/token", data={"username": username, "password": password})
+
+
+async def sample_latency(client: httpx.AsyncClient, path: str, token: str, stop: asyncio.Event) -> List[float]:
+    """Back-to-back GETs until stop is set; latencies in milliseconds"""
+    timings = []
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(timings: List[float], fraction: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name: str, timings: List[float]) -> None:
+    print(f"{name:<6} {len(timings):>6} GETs  median {statistics.median(timings):8.2f} ms  "
+          f"p95 {percentile(timings, 0.95):8.2f} ms  max {max(timings):8.2f} ms")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--login", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--path", default="/api/v1/invoices/?limit=20")
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument("--max-ratio", type=float, default=2.0)
+    parser.add_argument("--slack-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.logins + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        response = await login(client, args.login, args.password)
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_latency(client, args.path, token, stop))
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        idle = await sampler
+
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_latency(client, args.path, token, stop))
+        started = time.perf_counter()
+        logins = await asyncio.gather(
+            *(login(client, args.login, args.password) for _ in range(args.logins))
+        )
+        burst_seconds = time.perf_counter() - started
+        stop.set()
+        burst = await sampler
+
+    statuses = {}
+    for response in logins:
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    print(f"{args.logins} logins in {burst_seconds:.2f} s, status codes {statuses}")
+    report("idle", idle)
+    report("burst", burst)
+
+    limit_ms = percentile(idle, 0.95) * args.max_ratio + args.slack_ms
+    if percentile(burst, 0.95) > limit_ms:
+        print(f"FAIL: p95 during the burst exceeds {limit_ms:.2f} ms")
+        return 1
+    print(f"OK: p95 during the burst within {limit_ms:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
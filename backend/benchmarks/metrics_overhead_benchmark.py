@@ -0,0 +1,116 @@
+"""
+Per-request overhead of MetricsMiddleware.
+
+The middleware wraps an ASGI app that answers immediately after setting
+scope["route"] as the router would (matched once against the real route table
+of run.app, outside the timing), so the difference from calling that app
+directly is the middleware's own cost: reading the route template, the
+in-flight gauge and the counter and histogram updates. Exits with status 1
+when any path exceeds the budget.
+
+Importing run reads the usual settings (.env); no database connection is made.
+
+Run from the backend directory:
+    python -m benchmarks.metrics_overhead_benchmark [budget_us] [iterations]
+"""
+import asyncio
+import sys
+import time
+
+from starlette.routing import Match
+
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.config import engine
+from run import app
+
+PATHS = [
+    ("GET", "/"),
+    ("GET", "/api/v1/invoices/"),
+    ("GET", "/api/v1/invoices/123"),
+    ("DELETE", "/api/v1/invoices/123"),
+    ("GET", "/no/such/path"),
+]
+
+
+def dispatched_route(scope):
+    """The route run.app's router would dispatch to, as it stores it in scope["route"]"""
+    partial = None
+    for route in app.router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return child_scope.get("route", route)
+        if match == Match.PARTIAL and partial is None:
+            partial = child_scope.get("route", route)
+    return partial
+
+
+def responder(route):
+    async def respond(scope, receive, send):
+        if route is not None:
+            scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return respond
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def make_scope(method, path):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "app": app,
+    }
+
+
+async def per_call_us(asgi_app, scope, iterations):
+    for _ in range(100):
+        await asgi_app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await asgi_app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def main():
+    budget_us = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    over_budget = []
+    for method, path in PATHS:
+        scope = make_scope(method, path)
+        respond = responder(dispatched_route(scope))
+        instrumented = MetricsMiddleware(respond)
+        bare = await per_call_us(respond, scope, iterations)
+        measured = await per_call_us(instrumented, scope, iterations)
+        overhead = measured - bare
+        if overhead > budget_us:
+            over_budget.append(f"{method} {path}")
+        print(f"{method:<6} {path:<24} overhead {overhead:7.2f} us/request "
+              f"({'over' if overhead > budget_us else 'within'} budget of {budget_us:.0f} us)")
+
+    started = time.perf_counter()
+    body = render_metrics(engine.pool)
+    print(f"/metrics render {(time.perf_counter() - started) * 1000:.2f} ms, {len(body)} bytes")
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
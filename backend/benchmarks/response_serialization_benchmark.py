@@ -0,0 +1,103 @@
+"""
+Throughput of invoice page serialization per page size.
+
+"validated" is the default path: every invoice is validated through
+InvoiceResponse from ORM attributes, then encoded by the stdlib JSON encoder.
+"fast" is the FAST_JSON_RESPONSES path: invoice_to_dict() plus
+serialization.dumps(), with orjson when it is installed and the stdlib encoder
+otherwise ("fast-stdlib" is always measured for comparison).
+
+Invoices are plain in-memory objects shaped like loaded ORM rows, so only
+serialization is measured. Importing the app reads the usual settings (.env).
+
+Run from the backend directory:
+    python -m benchmarks.response_serialization_benchmark [items_per_invoice] [seconds_per_case]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse
+
+from app.core import serialization
+from app.crud.invoice_crud import invoice_to_dict
+from app.schemas.schemas import InvoiceResponse
+
+PAGE_SIZES = (10, 50, 100)
+
+
+def make_invoice(invoice_id, items_per_invoice):
+    shop = SimpleNamespace(id=1, name="Магазин", photo=None, is_active=True)
+    items = [
+        SimpleNamespace(id=invoice_id * 1000 + i, name=f"Товар {i}", quantity=float(i), price=100.0 + i,
+                        total=i * (100.0 + i))
+        for i in range(1, items_per_invoice + 1)
+    ]
+    return SimpleNamespace(
+        id=invoice_id,
+        created_at=datetime(2024, 1, 1, 12, 30) + timedelta(minutes=invoice_id),
+        contact_info="Иванов Иван, +7 700 000 00 00",
+        additional_info="Доставка до склада",
+        total_amount=sum(item.total for item in items),
+        is_paid=invoice_id % 2 == 0,
+        shop_id=shop.id,
+        user_id=1,
+        shop=shop,
+        items=items
+    )
+
+
+def render_validated(invoices):
+    content = [InvoiceResponse.model_validate(invoice).model_dump(mode="json") for invoice in invoices]
+    return JSONResponse(content).body
+
+
+def render_fast(invoices):
+    return serialization.dumps([invoice_to_dict(invoice) for invoice in invoices])
+
+
+def render_fast_stdlib(invoices):
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return render_fast(invoices)
+    finally:
+        serialization.orjson = orjson
+
+
+def pages_per_second(render, invoices, seconds):
+    render(invoices)
+    pages = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        render(invoices)
+        pages += 1
+    return pages / elapsed
+
+
+def main():
+    items_per_invoice = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    cases = [("validated", render_validated), ("fast-stdlib", render_fast_stdlib)]
+    if serialization.orjson is not None:
+        cases.append(("fast-orjson", render_fast))
+    else:
+        print("orjson is not installed; the fast path uses the stdlib encoder")
+
+    print(f"{items_per_invoice} items per invoice")
+    for page_size in PAGE_SIZES:
+        invoices = [make_invoice(invoice_id, items_per_invoice) for invoice_id in range(1, page_size + 1)]
+        # Both paths must produce the same document
+        assert render_fast_stdlib(invoices) == render_validated(invoices)
+
+        baseline = None
+        for name, render in cases:
+            rate = pages_per_second(render, invoices, seconds)
+            baseline = baseline or rate
+            print(f"page {page_size:>3}  {name:<12} {rate:10.1f} pages/s  "
+                  f"{1000 / rate:8.3f} ms/page  x{rate / baseline:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,16 @@
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from app.api.user_routers import auth_router
 from app.api.invoice_routers import router as invoice_router
-from app.core.config import init_db, cleanup_db
+from app.api.admin_routers import admin_router
+from app.core.config import init_db, cleanup_db, engine
+from app.core.metrics import MetricsMiddleware, render_metrics, CONTENT_TYPE
+from app.core.health import check_readiness
+from app.core.pdf_renderer import pdf_renderer
+from app.crud.user_crud import password_hasher
 
 
 @asynccontextmanager
@@ -27,6 +33,8 @@ async def lifespan(app: FastAPI):
     try:
         print("Cleaning up database connections...")
         await cleanup_db()
+        pdf_renderer.shutdown()
+        password_hasher.shutdown()
         print("Cleanup completed!")
     except Exception as e:
         print(f"Error during cleanup: {e}")
@@ -55,10 +63,13 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+# Added last so it is outermost and times the whole middleware stack
+app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(invoice_router)
 app.include_router(auth_router)
+app.include_router(admin_router)
 
 
 @app.get("/", tags=["Root"])
@@ -71,13 +82,29 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of the worker serving the scrape, in the text exposition format"""
+    return Response(content=render_metrics(engine.pool), media_type=CONTENT_TYPE)
+
+
+@app.get("/health/live", tags=["Health"])
+async def liveness_check():
+    """The process is up and its event loop is serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """Database latency and pool usage; 503 when the worker should not get traffic"""
+    ready, report = await check_readiness(engine)
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "database": "connected"
-    }
+    """Kept for existing monitors; same as /health/ready"""
+    return await readiness_check()
 
 
 if __name__ == "__main__":
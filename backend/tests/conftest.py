@@ -0,0 +1,11 @@
+import os
+
+# app.core.config reads its settings and creates the engine at import time; no connection is made
+for name, value in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "127.0.0.1",
+    "DB_NAME": "test",
+    "DB_PORT": "3306",
+}.items():
+    os.environ.setdefault(name, value)
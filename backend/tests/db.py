@@ -0,0 +1,32 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.cache import shop_membership_cache, user_cache
+from app.models.models import Base, Shop, User, users_shops
+
+
+async def run_with_database(scenario):
+    """Run scenario(session) against a fresh in-memory SQLite database with the full schema"""
+    # Ids restart with every database, so nothing cached for an earlier one may be served
+    user_cache.clear()
+    shop_membership_cache.invalidate()
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+        async with factory() as session:
+            return await scenario(session)
+    finally:
+        await engine.dispose()
+
+
+async def add_user_with_shops(session: AsyncSession, shop_count: int, is_superuser: bool = False):
+    """A user assigned to shop_count new shops, plus one shop they are not assigned to"""
+    user = User(login="user", password="x", email="user@example.com", is_superuser=is_superuser)
+    shops = [Shop(name=f"shop {index}") for index in range(shop_count + 1)]
+    session.add_all([user, *shops])
+    await session.flush()
+    await session.execute(users_shops.insert(), [{"user_id": user.id, "shop_id": shop.id} for shop in shops[:-1]])
+    await session.commit()
+    return user, shops[:-1], shops[-1]
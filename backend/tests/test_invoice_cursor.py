@@ -0,0 +1,66 @@
+import asyncio
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+
+from app.crud.invoice_crud import decode_invoice_cursor, encode_invoice_cursor, fetch_invoice_summaries
+from app.models.models import Invoice
+from app.schemas.schemas import InvoiceFilter
+from tests.db import run_with_database, add_user_with_shops
+
+
+def test_cursor_round_trip():
+    invoice = Invoice(id=42, created_at=datetime(2024, 11, 3, 15, 51, 5))
+    assert decode_invoice_cursor(encode_invoice_cursor(invoice)) == (datetime(2024, 11, 3, 15, 51, 5), 42)
+
+
+def encoded(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    encode_invoice_cursor(Invoice(id=42, created_at=datetime(2024, 11, 3)))[:-3],
+    encoded(b"\xff\xfe"),
+    encoded(b"42"),
+    encoded(b'{"created_at": "2024-11-03", "id": 42}'),
+    encoded(b'["2024-11-03T15:51:05"]'),
+    encoded(b'["yesterday", 42]'),
+    encoded(b'["2024-11-03T15:51:05", "forty-two"]'),
+    encoded(b'[null, 42]'),
+    encoded(b'["2024-11-03T15:51:05", [42]]'),
+])
+def test_bad_or_tampered_cursor_is_rejected_with_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_invoice_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def test_keyset_pages_cover_every_invoice_once_newest_first():
+    async def scenario(session):
+        user, (shop,), _ = await add_user_with_shops(session, 1)
+        # Ties on created_at are broken by id
+        timestamps = [datetime(2024, 11, day, 12) for day in (1, 2, 2, 2, 3, 4, 4)]
+        await session.execute(insert(Invoice), [
+            {"created_at": created_at, "shop_id": shop.id, "user_id": user.id, "total_amount": 1}
+            for created_at in timestamps
+        ])
+        await session.commit()
+        expected = (await session.execute(
+            select(Invoice.id).order_by(Invoice.created_at.desc(), Invoice.id.desc())
+        )).scalars().all()
+
+        seen, after = [], None
+        while True:
+            rows = await fetch_invoice_summaries(session, user, InvoiceFilter(), limit=3, after=after)
+            seen += [row.id for row in rows]
+            if len(rows) < 3:
+                break
+            after = encode_invoice_cursor(rows[-1])
+        assert seen == expected
+
+    asyncio.run(run_with_database(scenario))
@@ -0,0 +1,126 @@
+import asyncio
+
+from sqlalchemy import func, select, case
+
+from app.crud.invoice_crud import insert_invoice, insert_invoices_bulk, update_invoice_db, delete_invoice_db
+from app.models.models import Invoice, InvoiceDailyStats, InvoiceItem
+from app.schemas.schemas import InvoiceCreate, InvoiceItemCreate, InvoiceItemUpdate, InvoiceUpdate
+from tests.db import run_with_database, add_user_with_shops
+
+
+def invoice_create(shop_id: int, contact: str, amounts, is_paid: bool = False) -> InvoiceCreate:
+    items = [InvoiceItemCreate(name=f"{contact} item {index}", quantity=1, price=amount, total=amount)
+             for index, amount in enumerate(amounts)]
+    return InvoiceCreate(
+        shop_id=shop_id,
+        contact_info=contact,
+        total_amount=sum(amounts),
+        is_paid=is_paid,
+        items=items
+    )
+
+
+def test_bulk_best_effort_maps_created_ids_to_their_invoices_and_items():
+    async def scenario(session):
+        user, (shop_a, shop_b), foreign_shop = await add_user_with_shops(session, 2)
+        invoices_data = [
+            invoice_create(shop_a.id, "first", [10, 5]),
+            invoice_create(foreign_shop.id, "rejected", [1]),
+            invoice_create(shop_b.id, "second", [7]),
+            invoice_create(999, "missing shop", [1]),
+            invoice_create(shop_a.id, "third", [1, 2, 3], is_paid=True),
+        ]
+
+        results = await insert_invoices_bulk(session, invoices_data, user, atomic=False)
+
+        assert [(entry.index, entry.status) for entry in results] == [
+            (0, "created"), (1, "rejected"), (2, "created"), (3, "rejected"), (4, "created")
+        ]
+        for entry in results:
+            if entry.status == "rejected":
+                assert entry.id is None
+                continue
+            sent = invoices_data[entry.index]
+            invoice = (await session.execute(select(Invoice).where(Invoice.id == entry.id))).scalar_one()
+            items = (await session.execute(
+                select(InvoiceItem.name).where(InvoiceItem.invoice_id == entry.id).order_by(InvoiceItem.id)
+            )).scalars().all()
+            assert (invoice.contact_info, invoice.shop_id) == (sent.contact_info, sent.shop_id)
+            assert items == [item.name for item in sent.items]
+
+    asyncio.run(run_with_database(scenario))
+
+
+async def rollup_and_raw_totals(session):
+    rollup = (await session.execute(
+        select(
+            InvoiceDailyStats.shop_id,
+            InvoiceDailyStats.day,
+            InvoiceDailyStats.invoice_count,
+            InvoiceDailyStats.total_amount,
+            InvoiceDailyStats.paid_count,
+            InvoiceDailyStats.paid_amount
+        ).where(InvoiceDailyStats.invoice_count != 0).order_by(InvoiceDailyStats.shop_id, InvoiceDailyStats.day)
+    )).all()
+    day = func.date(Invoice.created_at)
+    raw = (await session.execute(
+        select(
+            Invoice.shop_id,
+            day,
+            func.count(Invoice.id),
+            func.sum(Invoice.total_amount),
+            func.sum(case((Invoice.is_paid, 1), else_=0)),
+            func.sum(case((Invoice.is_paid, Invoice.total_amount), else_=0))
+        ).group_by(Invoice.shop_id, day).order_by(Invoice.shop_id, day)
+    )).all()
+    normalize = lambda rows: [
+        (shop_id, str(day), int(count), round(float(total), 2), int(paid), round(float(paid_total), 2))
+        for shop_id, day, count, total, paid, paid_total in rows
+    ]
+    return normalize(rollup), normalize(raw)
+
+
+def test_daily_rollup_matches_raw_invoices_after_create_update_and_delete():
+    async def scenario(session):
+        user, (shop_a, shop_b), _ = await add_user_with_shops(session, 2, is_superuser=True)
+
+        first = await insert_invoice(session, invoice_create(shop_a.id, "first", [10, 5]), user)
+        await insert_invoice(session, invoice_create(shop_a.id, "second", [2.5], is_paid=True), user)
+        await insert_invoices_bulk(session, [
+            invoice_create(shop_a.id, "bulk a", [4]),
+            invoice_create(shop_b.id, "bulk b", [8, 1], is_paid=True),
+        ], user)
+        rollup, raw = await rollup_and_raw_totals(session)
+        assert rollup == raw
+        assert len(raw) == 2
+
+        # Paid, and one item's quantity changed: total_amount moves from 15 to 25
+        await update_invoice_db(session, first.id, InvoiceUpdate(is_paid=True, items=[
+            InvoiceItemUpdate(id=first.items[0].id, name="first item 0", quantity=2, price=10),
+            InvoiceItemUpdate(id=first.items[1].id, name="first item 1", quantity=1, price=5),
+        ]), user)
+        rollup, raw = await rollup_and_raw_totals(session)
+        assert rollup == raw
+        assert raw[0][3] == 31.5 and raw[0][4] == 2
+
+        await delete_invoice_db(session, first.id, user)
+        rollup, raw = await rollup_and_raw_totals(session)
+        assert rollup == raw
+        assert raw[0][2] == 2
+
+    asyncio.run(run_with_database(scenario))
+
+
+def test_insert_invoice_returns_the_stored_item_ids():
+    async def scenario(session):
+        user, (shop,), _ = await add_user_with_shops(session, 1)
+        await insert_invoice(session, invoice_create(shop.id, "earlier", [1, 1]), user)
+
+        invoice = await insert_invoice(session, invoice_create(shop.id, "later", [3, 4, 5]), user)
+
+        stored = (await session.execute(
+            select(InvoiceItem.id, InvoiceItem.name).where(InvoiceItem.invoice_id == invoice.id).order_by(InvoiceItem.id)
+        )).all()
+        assert [(item.id, item.name) for item in invoice.items] == [tuple(row) for row in stored]
+
+    asyncio.run(run_with_database(scenario))
@@ -0,0 +1,56 @@
+from app.crud.invoice_crud import merge_invoice_items
+from app.models.models import Invoice, InvoiceItem
+from app.schemas.schemas import InvoiceItemUpdate
+
+
+def make_invoice(*items):
+    return Invoice(items=[
+        InvoiceItem(id=item_id, name=name, quantity=quantity, price=price, total=round(quantity * price, 2))
+        for item_id, name, quantity, price in items
+    ])
+
+
+STORED = ((1, "Tea", 2.0, 3.5), (2, "Milk", 1.0, 0.99), (3, "Bread", 3.0, 1.2))
+
+
+def test_resending_the_stored_list_is_a_no_op():
+    invoice = make_invoice(*STORED)
+    before = [(item.id, item.name, item.quantity, item.price, item.total) for item in invoice.items]
+
+    # Without ids (as the payment-status toggle sends them) and in another order
+    items_data = [InvoiceItemUpdate(name=name, quantity=quantity, price=price) for _, name, quantity, price in STORED]
+    assert merge_invoice_items(invoice, list(reversed(items_data))) is False
+    # With ids
+    items_data = [InvoiceItemUpdate(id=item_id, name=name, quantity=quantity, price=price)
+                  for item_id, name, quantity, price in STORED]
+    assert merge_invoice_items(invoice, items_data) is False
+
+    assert [(item.id, item.name, item.quantity, item.price, item.total) for item in invoice.items] == before
+
+
+def test_partial_diff_updates_reuses_inserts_and_deletes_only_what_changed():
+    invoice = make_invoice(*STORED)
+    tea, milk, bread = invoice.items
+
+    changed = merge_invoice_items(invoice, [
+        InvoiceItemUpdate(id=1, name="Tea", quantity=4, price=3.5),    # quantity changed, by id
+        InvoiceItemUpdate(name="Bread", quantity=3, price=1.2),        # unchanged, matched by content
+        InvoiceItemUpdate(name="Butter", quantity=1, price=2.5),       # new, reuses Milk's row
+        InvoiceItemUpdate(name="Jam", quantity=2, price=1.25),         # new, inserted
+    ])
+
+    assert changed is True
+    assert tea.quantity == 4 and tea.total == 14.0
+    assert (bread.name, bread.quantity, bread.price) == ("Bread", 3.0, 1.2)
+    assert (milk.id, milk.name, milk.total) == (2, "Butter", 2.5)
+    jam = [item for item in invoice.items if item.name == "Jam"]
+    assert len(jam) == 1 and jam[0].id is None and jam[0].total == 2.5
+    assert len(invoice.items) == 4
+
+
+def test_dropped_items_are_removed():
+    invoice = make_invoice(*STORED)
+    changed = merge_invoice_items(invoice, [InvoiceItemUpdate(id=2, name="Milk", quantity=1, price=0.99)])
+
+    assert changed is True
+    assert [item.id for item in invoice.items] == [2]
@@ -0,0 +1,37 @@
+import os
+import time
+
+from app.core.pdf_renderer import PRUNE_GRACE_SECONDS, prune_pdf_cache
+
+
+def _write(directory, name: str, size: int, age: float) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "wb") as file:
+        file.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_prune_removes_expired_superseded_and_stale_temp_files(tmp_path):
+    old = PRUNE_GRACE_SECONDS + 10
+    _write(tmp_path, "invoice_1_new.pdf", 10, old)
+    _write(tmp_path, "invoice_1_old.pdf", 10, old + 10)
+    _write(tmp_path, "invoice_2_a.pdf", 10, 10_000)
+    _write(tmp_path, "batch_x.pdf.tmp", 10, old)
+
+    removed = prune_pdf_cache(str(tmp_path), max_bytes=1000, max_age_seconds=5_000)
+
+    assert removed == 3
+    assert sorted(os.listdir(tmp_path)) == ["invoice_1_new.pdf"]
+
+
+def test_prune_evicts_least_recently_used_but_spares_fresh_files(tmp_path):
+    old = PRUNE_GRACE_SECONDS + 10
+    _write(tmp_path, "invoice_1_a.pdf", 10, 1)
+    _write(tmp_path, "invoice_2_a.pdf", 10, old)
+    _write(tmp_path, "invoice_3_a.pdf", 10, old + 10)
+
+    prune_pdf_cache(str(tmp_path), max_bytes=20, max_age_seconds=10_000)
+
+    assert sorted(os.listdir(tmp_path)) == ["invoice_1_a.pdf", "invoice_2_a.pdf"]
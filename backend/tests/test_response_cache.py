@@ -0,0 +1,108 @@
+import asyncio
+
+from app.core.response_cache import MemoryBackend, RedisBackend, ResponseCache
+
+
+class RespStandIn:
+    """Just enough of a Redis server for RedisBackend: GET, SET [EX], DBSIZE and INFO"""
+
+    def __init__(self):
+        self.store = {}
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    async def _read_command(reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value: bytes) -> bytes:
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    async def _serve(self, reader, writer):
+        while (args := await self._read_command(reader)) is not None:
+            command = args[0].upper()
+            if command == b"GET":
+                value = self.store.get(args[1])
+                writer.write(b"$-1\r\n" if value is None else self._bulk(value))
+            elif command == b"SET":
+                self.store[args[1]] = args[2]
+                writer.write(b"+OK\r\n")
+            elif command == b"DBSIZE":
+                writer.write(b":%d\r\n" % len(self.store))
+            elif command == b"INFO":
+                writer.write(self._bulk(b"# Memory\r\nused_memory:1024\r\nmaxmemory:0\r\n"))
+            else:
+                writer.write(b"-ERR unknown command\r\n")
+            await writer.drain()
+        writer.close()
+
+
+def test_memory_backend_evicts_least_recently_used_entries_by_size():
+    async def scenario():
+        backend = MemoryBackend(max_bytes=25)
+        await backend.set("a", b"x" * 9)
+        await backend.set("b", b"x" * 9)
+        await backend.get("a")
+        await backend.set("c", b"x" * 9)
+        return await backend.get("a"), await backend.get("b"), await backend.get("c"), backend.bytes_used
+
+    a, b, c, bytes_used = asyncio.run(scenario())
+    assert a is not None and c is not None
+    assert b is None
+    assert bytes_used == 20
+
+
+def test_key_changes_with_the_database_version():
+    assert ResponseCache.key("stats", "[[1, 5]]", {"x": 1}) == ResponseCache.key("stats", "[[1, 5]]", {"x": 1})
+    assert ResponseCache.key("stats", "[[1, 5]]", {"x": 1}) != ResponseCache.key("stats", "[[1, 6]]", {"x": 1})
+    assert ResponseCache.key("stats", "[[1, 5]]", {"x": 1}) != ResponseCache.key("series", "[[1, 5]]", {"x": 1})
+
+
+def test_redis_backend_round_trip_against_a_resp_stand_in():
+    async def scenario():
+        stand_in = RespStandIn()
+        port = await stand_in.start()
+        try:
+            cache = ResponseCache(RedisBackend(f"redis://127.0.0.1:{port}/0"), ttl_seconds=60)
+            missed, key = await cache.get("stats", "[[1, 1]]", {})
+            await cache.set(key, b'{}\n{"total": 1}')
+            hit, _ = await cache.get("stats", "[[1, 1]]", {})
+            after_write, _ = await cache.get("stats", "[[1, 2]]", {})
+            return missed, hit, after_write, await cache.stats()
+        finally:
+            await stand_in.stop()
+
+    missed, hit, after_write, stats = asyncio.run(scenario())
+    assert missed is None
+    assert hit == b'{}\n{"total": 1}'
+    assert after_write is None
+    assert (stats["hits"], stats["misses"], stats["errors"]) == (1, 2, 0)
+    assert stats["entries"] == 1
+
+
+def test_backend_errors_count_as_misses():
+    async def scenario():
+        stand_in = RespStandIn()
+        port = await stand_in.start()
+        await stand_in.stop()
+        cache = ResponseCache(RedisBackend(f"redis://127.0.0.1:{port}/0"), ttl_seconds=60)
+        return await cache.get("stats", "[[1, 1]]", {}), cache
+
+    (value, key), cache = asyncio.run(scenario())
+    assert value is None and key is None
+    assert cache.errors == 1
@@ -0,0 +1,74 @@
+"""
+Per-PDF latency of the invoice generator.
+
+"cold" reproduces the old behaviour of building a fresh generator for every
+print: the TTF font is parsed and registered again and the stylesheet rebuilt.
+"warm" reuses the process-wide generator from get_pdf_generator().
+
+Run from the repository root:
+    python -m front.benchmarks.pdf_generator_benchmark [iterations]
+"""
+import io
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from front.utils.pdf_generator import FONT_NAME, FONT_PATH, InvoicePDFGenerator, get_pdf_generator
+
+SAMPLE_INVOICE = {
+    'id': 1,
+    'created_at': datetime(2024, 1, 1).isoformat(),
+    'contact': 'Иванов Иван, +7 700 000 00 00',
+    'additional_info': 'Доставка до склада',
+    'items': [
+        {'name': f'Товар {i}', 'quantity': i, 'price': 100.0 + i}
+        for i in range(1, 21)
+    ],
+    'total': sum(i * (100.0 + i) for i in range(1, 21)),
+    'is_paid': True
+}
+
+
+def render_cold():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+    generator = InvoicePDFGenerator()
+    generator._build(io.BytesIO(), SAMPLE_INVOICE)
+
+
+def render_warm():
+    get_pdf_generator()._build(io.BytesIO(), SAMPLE_INVOICE)
+
+
+def measure(render, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:<5} mean {statistics.mean(timings):8.2f} ms  "
+          f"median {statistics.median(timings):8.2f} ms  p95 {p95:8.2f} ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    started = time.perf_counter()
+    get_pdf_generator().warm_up()
+    print(f"warm-up {(time.perf_counter() - started) * 1000:.2f} ms (paid once, in the background)")
+
+    report("cold", measure(render_cold, iterations))
+    report("warm", measure(render_warm, iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 # controllers/base_api_controller.py
-from typing import Callable, Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, Tuple
 from kivy.network.urlrequest import UrlRequest
+from collections import OrderedDict
 from functools import partial
 import json
 import logging
@@ -12,6 +13,10 @@ logger = logging.getLogger(__name__)
 
 
 class BaseAPIController:
+    # GET responses that came with an ETag, keyed by (url, Authorization) and shared by all controllers
+    _response_cache: "OrderedDict[Tuple[str, str], Tuple[str, Any]]" = OrderedDict()
+    RESPONSE_CACHE_MAX_SIZE = 200
+
     def __init__(self, base_url: str = "http://localhost:8000", auth_controller: Optional[Any] = None):
         self.base_url = base_url
         self.auth_controller = auth_controller
@@ -51,6 +56,23 @@ class BaseAPIController:
         if error_callback:
             error_callback(error_message)
 
+    @staticmethod
+    def _get_response_header(req: UrlRequest, name: str) -> Optional[str]:
+        for key, value in (req.resp_headers or {}).items():
+            if key.lower() == name.lower():
+                return value
+        return None
+
+    def _remember_response(self, cache_key: Tuple[str, str], req: UrlRequest, result: Any) -> None:
+        etag = self._get_response_header(req, 'ETag')
+        if etag:
+            self._response_cache[cache_key] = (etag, result)
+            self._response_cache.move_to_end(cache_key)
+            while len(self._response_cache) > self.RESPONSE_CACHE_MAX_SIZE:
+                self._response_cache.popitem(last=False)
+        else:
+            self._response_cache.pop(cache_key, None)
+
     def _make_request(
             self,
             endpoint: str,
@@ -62,16 +84,40 @@ class BaseAPIController:
     ):
         """General method to make HTTP requests."""
         url = f"{self.base_url}{endpoint}"
+        headers = dict(headers or self._get_headers())
+
+        # Conditional GET: send the cached ETag and reuse the cached body on 304 Not Modified
+        cache_key = (url, headers.get("Authorization", "")) if method == 'GET' else None
+        cached = self._response_cache.get(cache_key) if cache_key else None
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
         logger.debug(f"Making {method} request to {url}")
         logger.debug(f"Request body: {req_body}")
-        logger.debug(f"Request headers: {headers or self._get_headers()}")
+        logger.debug(f"Request headers: {headers}")
+
+        def on_success(req, result):
+            if cache_key:
+                self._remember_response(cache_key, req, result)
+            if success_callback:
+                success_callback(req, result)
+
+        def on_redirect(req, result):
+            # UrlRequest hands every 3xx, including 304 Not Modified, to on_redirect
+            if req.resp_status == 304 and cached:
+                logger.debug(f"Not modified, using cached response for {url}")
+                if success_callback:
+                    success_callback(req, cached[1])
+            else:
+                self._handle_error(req, Exception(f"Unexpected redirect: HTTP {req.resp_status}"), error_callback)
 
         UrlRequest(
             url,
             req_body=req_body,
             method=method,
-            req_headers=headers or self._get_headers(),
-            on_success=lambda req, result: success_callback(req, result) if success_callback else None,
+            req_headers=headers,
+            on_success=on_success,
+            on_redirect=on_redirect,
             on_error=partial(self._handle_error, error_callback=error_callback),
             on_failure=partial(self._handle_error, error_callback=error_callback)
         )
@@ -1,6 +1,8 @@
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable
 from functools import partial
+from kivy.network.urlrequest import UrlRequest
 from .base_api_controller import BaseAPIController
+import json
 import logging
 from urllib.parse import urlencode, quote
 from datetime import datetime
@@ -55,6 +57,10 @@ class HistoryAPIController(BaseAPIController):
         """Retrieve list of invoices with optional filters."""
         endpoint = "/api/v1/invoices/"
 
+        # The history list only needs summary columns, not items/shop/user
+        filters = dict(filters or {})
+        filters.setdefault('view', 'summary')
+
         # Add filters to URL
         query_string = self._prepare_filters(filters)
         if query_string:
@@ -85,6 +91,47 @@ class HistoryAPIController(BaseAPIController):
             error_callback=error_callback
         )
 
+    def search_invoices(
+            self,
+            query: str,
+            shop_id: Optional[int] = None,
+            limit: int = 100,
+            success_callback: Optional[Callable[[Any], None]] = None,
+            error_callback: Optional[Callable[[str], None]] = None
+    ):
+        """Full-text search over invoice contacts and item names, best match first."""
+        endpoint = "/api/v1/invoices/search"
+
+        filters = {'q': query, 'limit': limit}
+        if shop_id:
+            filters['shop_id'] = shop_id
+
+        endpoint += self._prepare_filters(filters)
+        logger.debug(f"Searching invoices: {query}")
+
+        def success_wrapper(req, result):
+            """Handle successful response with format validation"""
+            try:
+                if success_callback:
+                    if isinstance(result, list):
+                        success_callback(result)
+                    else:
+                        logger.error(f"Unexpected response format: {result}")
+                        if error_callback:
+                            error_callback("Unexpected response format from server")
+            except Exception as e:
+                logger.error(f"Error in success callback: {e}")
+                if error_callback:
+                    error_callback(str(e))
+
+        self._make_request(
+            endpoint=endpoint,
+            method='GET',
+            headers=self._get_headers(),
+            success_callback=success_wrapper,
+            error_callback=error_callback
+        )
+
     def get_invoice_stats(
             self,
             start_date: Optional[datetime] = None,
@@ -135,6 +182,84 @@ class HistoryAPIController(BaseAPIController):
             error_callback=error_callback
         )
 
+    def get_invoice_series(
+            self,
+            bucket: str = "day",
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None,
+            shop_id: Optional[int] = None,
+            success_callback: Optional[Callable[[Any], None]] = None,
+            error_callback: Optional[Callable[[str], None]] = None
+    ):
+        """Get invoice count and revenue per day, week or month."""
+        endpoint = "/api/v1/invoices/stats/series"
+
+        filters = {'bucket': bucket}
+        if start_date:
+            filters['start_date'] = start_date
+        if end_date:
+            filters['end_date'] = end_date
+        if shop_id:
+            filters['shop_id'] = shop_id
+        elif self.auth_controller and hasattr(self.auth_controller, 'current_shop_id'):
+            filters['shop_id'] = self.auth_controller.current_shop_id
+
+        query_string = self._prepare_filters(filters)
+        if query_string:
+            endpoint += query_string
+
+        logger.debug(f"Fetching invoice series with filters: {filters}")
+
+        def success_wrapper(req, result):
+            """Handle successful response with format validation"""
+            try:
+                if success_callback:
+                    if isinstance(result, dict) and isinstance(result.get('series'), list):
+                        success_callback(result)
+                    else:
+                        logger.error(f"Unexpected response format: {result}")
+                        if error_callback:
+                            error_callback("Unexpected response format from server")
+            except Exception as e:
+                logger.error(f"Error in success callback: {e}")
+                if error_callback:
+                    error_callback(str(e))
+
+        self._make_request(
+            endpoint=endpoint,
+            method='GET',
+            headers=self._get_headers(),
+            success_callback=success_wrapper,
+            error_callback=error_callback
+        )
+
+    def download_invoices_pdf(
+            self,
+            invoice_ids: List[int],
+            file_path: str,
+            export_format: str = "pdf",
+            success_callback: Optional[Callable[[str], None]] = None,
+            error_callback: Optional[Callable[[str], None]] = None
+    ):
+        """Download several invoices as one merged PDF or a ZIP of PDFs, rendered on the server."""
+        url = f"{self.base_url}/api/v1/invoices/pdf/batch"
+        req_body = json.dumps({'ids': invoice_ids, 'format': export_format})
+        headers = self._get_headers()
+        headers["Accept"] = "application/pdf" if export_format == "pdf" else "application/zip"
+        logger.debug(f"Downloading {len(invoice_ids)} invoices as {export_format} to {file_path}")
+
+        # The response body is written straight to file_path instead of being held in memory
+        UrlRequest(
+            url,
+            req_body=req_body,
+            method='POST',
+            req_headers=headers,
+            file_path=file_path,
+            on_success=lambda req, result: success_callback(file_path) if success_callback else None,
+            on_error=partial(self._handle_error, error_callback=error_callback),
+            on_failure=partial(self._handle_error, error_callback=error_callback)
+        )
+
     def get_last_invoice(
             self,
             success_callback: Optional[Callable[[Any], None]] = None,
@@ -137,6 +137,8 @@ class InvoiceAPIController(BaseAPIController):
                 "is_paid": bool(invoice_data.get("is_paid", False)),
                 "items": [
                     {
+                        # Lets the server update stored items in place instead of re-inserting them
+                        "id": item.get("id"),
                         "name": item["name"],
                         "article": item.get("article", ""),
                         "quantity": float(item["quantity"]),
@@ -1,3 +1,4 @@
+import threading
 from kivy.app import App
 from kivy.lang import Builder
 from kivy.uix.screenmanager import ScreenManager
@@ -9,6 +10,7 @@ from front.views.history_view import HistoryView
 from front.views.main_view import MainView
 from front.views.invoice_view import InvoiceView
 from front.controllers.auth_controller import AuthAPIController
+from front.utils.pdf_generator import warm_up_pdf_generator
 
 
 class InvoiceApp(App):
@@ -33,6 +35,8 @@ class InvoiceApp(App):
         Window.rotation = 0
 
     def build(self):
+        # Font parsing and reportlab setup happen off the UI thread, before the first print
+        threading.Thread(target=warm_up_pdf_generator, daemon=True).start()
 
         Builder.load_file('views/kv_view/styles.kv')
         Builder.load_file('views/kv_view/date_picker.kv')
@@ -58,7 +62,8 @@ class InvoiceApp(App):
         history_view = HistoryView(sm)
         history_view.auth_controller = auth_controller
 
-        AnalyticsView(sm)
+        analytics_view = AnalyticsView(sm)
+        analytics_view.auth_controller = auth_controller
 
         return sm
 
@@ -0,0 +1,57 @@
+from front.controllers import base_api_controller
+from front.controllers.base_api_controller import BaseAPIController
+
+
+class FakeUrlRequest:
+    """Records the UrlRequest arguments instead of sending anything"""
+    created = []
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.kwargs = kwargs
+        self.resp_status = None
+        self.resp_headers = {}
+        self.result = None
+        FakeUrlRequest.created.append(self)
+
+    def respond(self, status, result, headers=None):
+        self.resp_status = status
+        self.resp_headers = headers or {}
+        self.result = result
+        # Same dispatch as kivy's UrlRequest: 2xx to on_success, 3xx to on_redirect
+        if 300 <= status < 400:
+            self.kwargs["on_redirect"](self, result)
+        else:
+            self.kwargs["on_success"](self, result)
+
+
+def test_not_modified_response_reuses_the_cached_body(monkeypatch):
+    monkeypatch.setattr(base_api_controller, "UrlRequest", FakeUrlRequest)
+    monkeypatch.setattr(BaseAPIController, "_response_cache", type(BaseAPIController._response_cache)())
+    FakeUrlRequest.created = []
+    controller = BaseAPIController(base_url="http://api")
+    received = []
+
+    controller._make_request("/api/v1/invoices/1", success_callback=lambda req, result: received.append(result))
+    first = FakeUrlRequest.created[-1]
+    assert "If-None-Match" not in first.kwargs["req_headers"]
+    first.respond(200, {"id": 1}, {"ETag": '"invoice-1-3"'})
+
+    controller._make_request("/api/v1/invoices/1", success_callback=lambda req, result: received.append(result))
+    second = FakeUrlRequest.created[-1]
+    assert second.kwargs["req_headers"]["If-None-Match"] == '"invoice-1-3"'
+    second.respond(304, "")
+
+    assert received == [{"id": 1}, {"id": 1}]
+
+
+def test_other_redirects_are_reported_as_errors(monkeypatch):
+    monkeypatch.setattr(base_api_controller, "UrlRequest", FakeUrlRequest)
+    monkeypatch.setattr(BaseAPIController, "_response_cache", type(BaseAPIController._response_cache)())
+    controller = BaseAPIController(base_url="http://api")
+    errors = []
+
+    controller._make_request("/api/v1/invoices/1", error_callback=errors.append)
+    FakeUrlRequest.created[-1].respond(301, "")
+
+    assert errors == ["Unexpected redirect: HTTP 301"]
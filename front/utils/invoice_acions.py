@@ -3,7 +3,7 @@ import os
 import subprocess
 from kivy.uix.popup import Popup
 from kivy.uix.label import Label
-from front.utils.pdf_generator import InvoicePDFGenerator
+from front.utils.pdf_generator import InvoicePDFGenerator, get_pdf_generator
 from front.utils.share_pdf import ShareManager
 
 
@@ -40,8 +40,7 @@ class InvoiceActionsMixin:
             pdf_path = os.path.join(pdf_dir, filename)
 
             # Generate PDF
-            pdf_generator = InvoicePDFGenerator()
-            generated_pdf = pdf_generator.generate_pdf(invoice_data, pdf_path)
+            generated_pdf = get_pdf_generator().generate_pdf(invoice_data, pdf_path)
 
             # Open PDF with the system viewer
             if os.path.exists(generated_pdf):
@@ -69,7 +68,7 @@ class InvoiceActionsMixin:
                 return
 
             # Create PDF
-            pdf_generator = InvoicePDFGenerator()
+            pdf_generator = get_pdf_generator()
             invoice_id = self.displayed_text or 'new'
             filename = InvoicePDFGenerator.get_invoice_filename(invoice_id)
             pdf_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'generated_pdfs', filename)
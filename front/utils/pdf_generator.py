@@ -6,40 +6,73 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.units import cm
+import io
 import os
+import threading
 from datetime import datetime
 
+# Получаем абсолютный путь к директории utils
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Путь к файлу шрифта в текущей директории
+FONT_PATH = os.path.join(CURRENT_DIR, 'DejaVuSans.ttf')
+FONT_NAME = 'DejaVu'
+
+# Путь к директории для сохранения PDF
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(CURRENT_DIR)), 'generated_pdfs')
+
+_font_lock = threading.Lock()
+_font_registered = False
+
+# Стиль таблицы товаров не зависит от данных, создаём его один раз
+ITEMS_TABLE_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, -1), FONT_NAME),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('BOX', (0, 0), (-1, -1), 2, colors.black),
+    ('LINEABOVE', (0, 1), (-1, 1), 2, colors.black),
+    ('LINEBEFORE', (1, 1), (1, -1), 1, colors.black),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+    ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
+])
+ITEMS_TABLE_COL_WIDTHS = [1 * cm, 8 * cm, 3 * cm, 3 * cm, 3 * cm]
+
+
+def register_fonts():
+    """Регистрирует шрифт с кириллицей один раз на процесс"""
+    global _font_registered
+    if _font_registered:
+        return
+    with _font_lock:
+        if _font_registered:
+            return
+        # Проверяем существование файла шрифта
+        if not os.path.exists(FONT_PATH):
+            raise FileNotFoundError(
+                f"Шрифт не найден по пути: {FONT_PATH}\n"
+                f"Пожалуйста, убедитесь что файл DejaVuSans.ttf находится в директории: {CURRENT_DIR}"
+            )
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+        _font_registered = True
+
 
 class InvoicePDFGenerator:
     def __init__(self):
-        # Получаем абсолютный путь к директории utils
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # Путь к файлу шрифта в текущей директории
-        font_path = os.path.join(current_dir, 'DejaVuSans.ttf')
-
-        # Путь к директории для сохранения PDF
-        project_dir = os.path.dirname(os.path.dirname(current_dir))
-        self.output_dir = os.path.join(project_dir, 'generated_pdfs')
+        register_fonts()
 
+        self.output_dir = OUTPUT_DIR
         # Создаём директорию для PDF если её нет
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # Проверяем существование файла шрифта
-        if not os.path.exists(font_path):
-            raise FileNotFoundError(
-                f"Шрифт не найден по пути: {font_path}\n"
-                f"Пожалуйста, убедитесь что файл DejaVuSans.ttf находится в директории: {current_dir}"
-            )
-
-        # Регистрация шрифта для поддержки кириллицы
-        pdfmetrics.registerFont(TTFont('DejaVu', font_path))
-
         self.styles = getSampleStyleSheet()
         self.style_header = ParagraphStyle(
             'CustomHeader',
             parent=self.styles['Heading1'],
-            fontName='DejaVu',
+            fontName=FONT_NAME,
             fontSize=16,
             spaceAfter=30,
             alignment=1  # Center alignment
@@ -48,20 +81,37 @@ class InvoicePDFGenerator:
         self.style_normal = ParagraphStyle(
             'CustomNormal',
             parent=self.styles['Normal'],
-            fontName='DejaVu',
+            fontName=FONT_NAME,
             fontSize=12,
             spaceBefore=6,
             spaceAfter=6
         )
 
+        self.style_total = ParagraphStyle(
+            'Total',
+            parent=self.style_normal,
+            fontSize=14,
+            alignment=2  # Right alignment
+        )
+
+        self.style_payment_status = ParagraphStyle(
+            'PaymentStatus',
+            parent=self.style_normal,
+            fontSize=14,
+            alignment=2
+        )
+
     def generate_pdf(self, invoice_data, filename=None):
         if filename is None:
             filename = self.get_invoice_filename(invoice_data.get('id', 'new'))
 
         output_path = os.path.join(self.output_dir, filename)
+        self._build(output_path, invoice_data)
+        return output_path
 
+    def _build(self, target, invoice_data):
         doc = SimpleDocTemplate(
-            output_path,
+            target,
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
@@ -102,21 +152,8 @@ class InvoicePDFGenerator:
                 ])
 
         # Создаем таблицу
-        table = Table(table_data, colWidths=[1 * cm, 8 * cm, 3 * cm, 3 * cm, 3 * cm])
-        table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, -1), 'DejaVu'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('BOX', (0, 0), (-1, -1), 2, colors.black),
-            ('LINEABOVE', (0, 1), (-1, 1), 2, colors.black),
-            ('LINEBEFORE', (1, 1), (1, -1), 1, colors.black),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-            ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
-        ]))
+        table = Table(table_data, colWidths=ITEMS_TABLE_COL_WIDTHS)
+        table.setStyle(ITEMS_TABLE_STYLE)
 
         elements.append(table)
         elements.append(Spacer(1, 0.5 * cm))
@@ -124,32 +161,53 @@ class InvoicePDFGenerator:
         # Добавляем итоговую сумму
         elements.append(Paragraph(
             f"Итого: {invoice_data.get('total', 0):.2f}",
-            ParagraphStyle(
-                'Total',
-                parent=self.style_normal,
-                fontSize=14,
-                alignment=2  # Right alignment
-            )
+            self.style_total
         ))
 
         # Добавляем статус оплаты
         payment_status = "Оплачено" if invoice_data.get('is_paid', False) else "Не оплачено"
         elements.append(Paragraph(
             f"Статус оплаты: {payment_status}",
-            ParagraphStyle(
-                'PaymentStatus',
-                parent=self.style_normal,
-                fontSize=14,
-                alignment=2
-            )
+            self.style_payment_status
         ))
 
         # Создаем PDF
         doc.build(elements)
-        return output_path
+
+    def warm_up(self):
+        """Рендерит небольшую накладную в память, чтобы прогреть кэши reportlab и шрифта"""
+        self._build(io.BytesIO(), {
+            'id': 0,
+            'created_at': datetime.now().isoformat(),
+            'contact': 'Прогрев',
+            'items': [{'name': 'Товар', 'quantity': 1, 'price': 1.0}],
+            'total': 1.0
+        })
 
     @staticmethod
     def get_invoice_filename(invoice_id):
         """Генерирует имя файла для накладной"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return f"invoice_{invoice_id}_{timestamp}.pdf"
\ No newline at end of file
+        return f"invoice_{invoice_id}_{timestamp}.pdf"
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_pdf_generator():
+    """Общий для всего процесса генератор PDF"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = InvoicePDFGenerator()
+    return _generator
+
+
+def warm_up_pdf_generator():
+    """Создаёт и прогревает генератор; вызывается в фоновом потоке при старте приложения"""
+    try:
+        get_pdf_generator().warm_up()
+    except Exception as e:
+        print(f"PDF generator warm-up failed: {e}")
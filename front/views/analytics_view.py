@@ -1,9 +1,59 @@
 # views/analytics_view.py
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from kivy.properties import ObjectProperty, StringProperty
 from kivy.uix.screenmanager import Screen
 
+from front.controllers.history_api_controller import HistoryAPIController
+
+# Period shown in the spinner -> (series bucket, days of history requested)
+PERIODS = {
+    'По дням': ('day', 30),
+    'По неделям': ('week', 182),
+    'По месяцам': ('month', 365),
+}
+
 
 class AnalyticsView(Screen):
-    def __init__(self, screen_manager):
-        super().__init__(name='analytics')
+    auth_controller = ObjectProperty(None)
+    series_text = StringProperty('')
+
+    def __init__(self, screen_manager, **kwargs):
+        super().__init__(name='analytics', **kwargs)
         self.sm = screen_manager
         self.sm.add_widget(self)
+        self.api_controller: HistoryAPIController = None
+
+    def on_auth_controller(self, instance, value) -> None:
+        if value:
+            self.api_controller = HistoryAPIController(auth_controller=value)
+
+    def on_enter(self):
+        self.load_series(self.ids.period.text)
+
+    def load_series(self, period: str) -> None:
+        if not self.api_controller or not self.auth_controller.token:
+            self.series_text = 'Необходима авторизация'
+            return
+
+        bucket, days = PERIODS[period]
+        self.series_text = 'Загрузка...'
+        self.api_controller.get_invoice_series(
+            bucket=bucket,
+            start_date=datetime.now() - timedelta(days=days),
+            success_callback=self.on_series_loaded,
+            error_callback=self.on_series_error
+        )
+
+    def on_series_loaded(self, result: Dict[str, Any]) -> None:
+        lines = [
+            f"{row['bucket']}: {row['total_invoices']} шт. на {row['total_amount']:.2f}, "
+            f"оплачено {row['paid_invoices']} шт. на {row['paid_amount']:.2f}"
+            for row in reversed(result['series'])
+        ]
+        self.series_text = '\n'.join(lines) or 'Нет накладных за период'
+
+    def on_series_error(self, error: str) -> None:
+        print(f"AnalyticsView: Series load error: {error}")
+        self.series_text = f"Ошибка загрузки аналитики: {error}"
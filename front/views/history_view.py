@@ -1,3 +1,5 @@
+import os
+import subprocess
 from kivy.factory import Factory
 from front.views.invoice_history_item import InvoiceItemWidget
 from kivy.uix.screenmanager import Screen
@@ -317,9 +319,31 @@ class HistoryView(Screen):
         if not self.validate_date_range():
             return
 
+        search_text = self.contact_filter.text.strip()
+        if search_text and self.api_controller:
+            # Contact search runs on the server over the whole history, not just the loaded page
+            def on_search_success(result):
+                found = [self._convert_invoice_to_display_format(invoice) for invoice in result]
+                self._apply_local_filters(found, match_contact=False)
+
+            def on_search_error(error):
+                print(f"Server search failed, filtering loaded invoices: {error}")
+                self._apply_local_filters(self.original_data)
+
+            self.api_controller.search_invoices(
+                search_text,
+                shop_id=self.current_shop_id,
+                success_callback=on_search_success,
+                error_callback=on_search_error
+            )
+            return
+
+        self._apply_local_filters(self.original_data)
+
+    def _apply_local_filters(self, source: List[Dict[str, Any]], match_contact: bool = True) -> None:
         try:
             filtered_data = [
-                invoice for invoice in self.original_data
+                invoice for invoice in source
                 if invoice.get('shop_id', self.current_shop_id) == self.current_shop_id
             ]
 
@@ -344,7 +368,7 @@ class HistoryView(Screen):
                     if datetime.strptime(invoice['date'], "%Y-%m-%d") <= date_to
                 ]
 
-            if self.contact_filter.text:
+            if match_contact and self.contact_filter.text:
                 search_contact = self.contact_filter.text.strip().lower()
                 filtered_data = [
                     invoice for invoice in filtered_data
@@ -379,6 +403,38 @@ class HistoryView(Screen):
             print(f"Error in search_invoices: {e}")
             self.show_message(f"Ошибка при фильтрации данных: {str(e)}")
 
+    def download_invoices_pdf(self, instance=None) -> None:
+        """Print all invoices currently shown in the list as one PDF rendered by the server."""
+        if not self.api_controller:
+            self.show_message("API контроллер не инициализирован")
+            return
+
+        invoice_ids = [int(invoice['number']) for invoice in self.current_data if invoice.get('number')]
+        if not invoice_ids:
+            self.show_message("Нет накладных для печати")
+            return
+
+        pdf_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'generated_pdfs')
+        os.makedirs(pdf_dir, exist_ok=True)
+        pdf_path = os.path.join(pdf_dir, f"invoices_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
+
+        def on_download_success(path: str):
+            if os.name == 'nt':  # Windows
+                os.startfile(path)
+            elif os.name == 'posix':  # macOS and Linux
+                subprocess.call(['xdg-open', path])
+            self.show_message(f"PDF с накладными ({len(invoice_ids)}) создан и открыт")
+
+        def on_download_error(error: str):
+            self.show_message(f"Ошибка при создании PDF: {error}")
+
+        self.api_controller.download_invoices_pdf(
+            invoice_ids,
+            pdf_path,
+            success_callback=on_download_success,
+            error_callback=on_download_error
+        )
+
     def refresh_list(self, instance=None) -> None:
         if not self.api_controller:
             print("HistoryView: No API controller")
@@ -12,6 +12,8 @@ class InvoiceTable(BoxLayout):
         self.price_input = self.ids.price
         self.sum_label = self.ids.sum
         self.number_label = self.ids.number
+        # ID of the stored invoice item shown in this row, if any
+        self.item_id = None
 
         self.bind_row_calculations()
 
@@ -44,6 +46,7 @@ class InvoiceTable(BoxLayout):
 
     def reset_values(self) -> None:
         """Сброс значений полей строки."""
+        self.item_id = None
         self.name_input.text = ""
         self.quantity_input.text = ''
         self.price_input.text = ''
@@ -62,6 +62,7 @@ class InvoiceView(Screen, InvoiceActionsMixin):
             "created_at": self.date_label.text,
             "items": [
                 {
+                    "id": row.item_id,
                     "name": row.name_input.text,
                     "quantity": float(row.quantity_input.text),
                     "price": float(row.price_input.text),
@@ -105,6 +106,7 @@ class InvoiceView(Screen, InvoiceActionsMixin):
             items = invoice_data.get('items', [])
             for item in items:
                 table_row = InvoiceTable()
+                table_row.item_id = item.get('id')
                 table_row.name_input.text = item.get('name', '')
                 table_row.quantity_input.text = str(item.get('quantity', '0'))
                 table_row.price_input.text = str(item.get('price', '0'))